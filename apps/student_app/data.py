@@ -10,7 +10,7 @@ class InboxItem:
     sub_id: str
     file: Path              # returned.docx/.doc/.html OR review.html
     label: str              # human label
-    comments_json: Path
+    comments_json: Optional[Path]  # None when the review has no comments.json (checked at scan time)
     when_label: str         # "submitted …" | "returned …"
     due_iso: Optional[str]  # UTC ISO or None
     due_label: str          # localised text or ""
@@ -1,12 +1,10 @@
 from __future__ import annotations
 
-import json
 import sys
-from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from PySide6.QtCore import QSettings, QSize, Qt
+from PySide6.QtCore import QSettings, QSize, QSortFilterProxyModel, Qt, QTimer
 from PySide6.QtGui import QAction, QKeySequence
 from PySide6.QtWidgets import (
     QAbstractItemView,
@@ -17,8 +15,7 @@ from PySide6.QtWidgets import (
     QInputDialog,
     QLabel,
     QLineEdit,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QMainWindow,
     QMessageBox,
     QPushButton,
@@ -33,7 +30,8 @@ from PySide6.QtWidgets import (
 # Local (refactor)
 from apps.student_app.data import InboxItem
 from apps.student_app.dialogs import prompt_due_datetime, prompt_mapping
-from apps.student_app.scan import scan_inbox
+from apps.student_app.models import HistoryModel, InboxModel
+from apps.student_app.scan import invalidate_inbox_cache, scan_inbox
 from apps.student_app.services import (
     change_mapping,
     create_submission_package,
@@ -41,6 +39,8 @@ from apps.student_app.services import (
     ensure_repo_ready,
     open_review,
     pull_review_to_working,
+    repo_write_now,
+    run_repo_write,
     write_minimal_paper_yaml,
 )
 
@@ -54,12 +54,34 @@ from paperrepo.repo import restore as repo_restore
 from shared.buildinfo import get_display_version, get_repo
 from shared.config import get_mapping
 from shared.due import is_overdue_iso, write_return_due
-from shared.paths import slugify
+from shared.jsonio import read_json
+from shared.osutil import prefetch_file
+from shared.paths import manuscript_root, slugify
+from shared.ui.tasks import run_in_pool
 from shared.ui.update_qt import check_for_updates
 from shared.updater import cleanup_legacy_appdata_if_any
 
 APP_NAME = "Paperforge — Student"
 
+
+def _render_comments(data: dict) -> str:
+    """Plain-text preview of a parsed comments.json ("" when it holds no comments)."""
+    general = (data.get("general") or "").strip()
+    items_list = data.get("items") or []
+    lines = []
+    if general: lines += ["GENERAL NOTES", "-------------", general, ""]
+    if items_list:
+        lines += ["ITEMISED COMMENTS", "-----------------"]
+        for i, it in enumerate(items_list, 1):
+            f = it.get("file", "")
+            ls = it.get("line_start", it.get("line", ""))
+            le = it.get("line_end", ls)
+            t = it.get("text", "")
+            loc = f"{f}:{ls}" if ls == le else f"{f}:{ls}-{le}"
+            lines.append(f"{i:02d}. {loc} — {t}")
+    return "\n".join(lines)
+
+
 class StudentWindow(QMainWindow):
     def __init__(self) -> None:
         super().__init__()
@@ -67,7 +89,11 @@ class StudentWindow(QMainWindow):
 
         # Toolbar
         tb = QToolBar("Quick actions", self); tb.setIconSize(QSize(18, 18)); tb.setToolButtonStyle(Qt.ToolButtonTextBesideIcon); self.addToolBar(tb)
-        style = self.style(); std = style.standardIcon
+        style = self.style(); _icons: dict = {}
+        def std(sp):  # standardIcon builds a new QIcon per call → reuse per pixmap id
+            ic = _icons.get(sp)
+            if ic is None: ic = _icons[sp] = style.standardIcon(sp)
+            return ic
         act_new = QAction(std(QStyle.SP_FileIcon), "New", self)
         act_open = QAction(std(QStyle.SP_DirOpenIcon), "Open", self)
         act_commit = QAction(std(QStyle.SP_DialogSaveButton), "Commit", self)
@@ -89,7 +115,7 @@ class StudentWindow(QMainWindow):
         act_submit.triggered.connect(self.submit_to_supervisor)
         act_setroot.triggered.connect(self.change_remote_for_current)
         act_hist.triggered.connect(self._refresh_history)
-        act_inbox.triggered.connect(self.refresh_inbox)
+        act_inbox.triggered.connect(lambda: self.refresh_inbox(force=True))
         act_restore.triggered.connect(self.restore_selected_commit)
         act_update.triggered.connect(self._check_updates)
 
@@ -114,7 +140,9 @@ class StudentWindow(QMainWindow):
 
         # History
         hist_box = QGroupBox("History (newest first)"); hist_layout = QHBoxLayout(hist_box)
-        self.history_list = QListWidget(self); self.history_list.setSelectionMode(QAbstractItemView.SingleSelection); self.history_list.itemSelectionChanged.connect(self._on_history_selection)
+        self.history_list = QListView(self); self.history_list.setSelectionMode(QAbstractItemView.SingleSelection); self.history_list.setUniformItemSizes(True)
+        self._history_model = HistoryModel(self); self.history_list.setModel(self._history_model)
+        self.history_list.selectionModel().selectionChanged.connect(self._on_history_selection)
         hist_btns = QVBoxLayout(); self.btn_refresh_hist = QPushButton("Refresh"); self.btn_restore = QPushButton("Restore to working copy…")
         self.btn_refresh_hist.clicked.connect(self._refresh_history); self.btn_restore.clicked.connect(self.restore_selected_commit)
         self.btn_restore.setEnabled(False); hist_btns.addWidget(self.btn_refresh_hist); hist_btns.addWidget(self.btn_restore); hist_btns.addStretch(1)
@@ -125,17 +153,25 @@ class StudentWindow(QMainWindow):
 
         inbox_box = QGroupBox("Inbox — reviews returned by supervisor"); inbox_layout = QVBoxLayout(inbox_box)
         search_row = QHBoxLayout(); search_row.addWidget(QLabel("Filter:"))
-        self.inbox_filter = QLineEdit(self); self.inbox_filter.setPlaceholderText("Search in submission id / filename / label"); self.inbox_filter.textChanged.connect(self._apply_inbox_filter)
+        self.inbox_filter = QLineEdit(self); self.inbox_filter.setPlaceholderText("Search in submission id / filename / label"); self.inbox_filter.textChanged.connect(lambda _=None: self._filter_timer.start())
         search_row.addWidget(self.inbox_filter); inbox_layout.addLayout(search_row)
-
-        self.inbox_list = QListWidget(self); self.inbox_list.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.inbox_list.itemSelectionChanged.connect(self._on_inbox_selection); inbox_layout.addWidget(self.inbox_list, 1)
+        self._filter_timer = QTimer(self); self._filter_timer.setSingleShot(True); self._filter_timer.setInterval(120)
+        self._filter_timer.timeout.connect(self._apply_inbox_filter)
+
+        self._inbox_model = InboxModel(self)
+        self._inbox_proxy = QSortFilterProxyModel(self); self._inbox_proxy.setSourceModel(self._inbox_model)
+        self._inbox_proxy.setFilterKeyColumn(0); self._inbox_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.inbox_list = QListView(self); self.inbox_list.setSelectionMode(QAbstractItemView.SingleSelection); self.inbox_list.setUniformItemSizes(True)
+        self.inbox_list.setModel(self._inbox_proxy)
+        self.inbox_list.selectionModel().selectionChanged.connect(self._on_inbox_selection); inbox_layout.addWidget(self.inbox_list, 1)
+        self._inbox_sel_timer = QTimer(self); self._inbox_sel_timer.setSingleShot(True); self._inbox_sel_timer.setInterval(50)
+        self._inbox_sel_timer.timeout.connect(self._load_comments_preview)
 
         inbox_btns = QHBoxLayout()
         self.btn_refresh_inbox = QPushButton("Refresh inbox")
         self.btn_open_review = QPushButton("Open selected review")
         self.btn_pull_review = QPushButton("Save a copy to working folder")
-        self.btn_refresh_inbox.clicked.connect(self.refresh_inbox)
+        self.btn_refresh_inbox.clicked.connect(lambda: self.refresh_inbox(force=True))
         self.btn_open_review.clicked.connect(self._open_selected_review)
         self.btn_pull_review.clicked.connect(self._pull_selected_review)
         self.btn_open_review.setEnabled(False); self.btn_pull_review.setEnabled(False)
@@ -160,17 +196,24 @@ class StudentWindow(QMainWindow):
         # State
         self.working_dir: Optional[Path] = None
         self._current_mroot: Optional[Path] = None
+        self._inbox_gen = 0
+        self._mapping_cache: Optional[dict] = None
+        self._is_repo_cache: Optional[bool] = None
+        self._committing = False
+        self._preview_key: Optional[tuple] = None  # (comments.json path, mtime_ns, size) currently shown
+        self._comments_cache: dict[tuple, str] = {}  # same key -> rendered preview text
         self.btn_refresh_inbox.setEnabled(False)
 
         self.setStyleSheet("""
-            QListWidget { font-size: 13px; }
+            QListView { font-size: 13px; }
             QPushButton { padding: 6px 10px; }
             QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 4px; }
         """)
 
         self._settings = QSettings("Paperforge", "Student")
-        if self._settings.value("geometry"): self.restoreGeometry(self._settings.value("geometry"))
-        if self._settings.value("state"): self.restoreState(self._settings.value("state"))
+        geom = self._settings.value("geometry"); state = self._settings.value("state")
+        if geom: self.restoreGeometry(geom)
+        if state: self.restoreState(state)
 
         self.statusBar().showMessage("Ready", 3000)
         cleanup_legacy_appdata_if_any()
@@ -181,7 +224,7 @@ class StudentWindow(QMainWindow):
 
     # ── Small helpers
     def _set_working_dir(self, path: Path) -> None:
-        self.working_dir = path
+        self.working_dir = path; self._mapping_cache = None; self._is_repo_cache = None
         self.header_title.setText(f"Manuscript: {path.name}")
         self.working_label.setText(str(path))
         self._update_mapping_label()
@@ -191,19 +234,37 @@ class StudentWindow(QMainWindow):
     def _update_mapping_label(self) -> None:
         if not self.working_dir:
             self.mapping_label.setText("Remote mapping: (none)"); return
-        m = get_mapping(self.working_dir)
+        m = self._get_mapping_cached()
         if m:
             self.mapping_label.setText(f"Remote: {m.get('students_root','')} → {m.get('student_name','')}/{m.get('slug','')}")
         else:
             self.mapping_label.setText("Remote mapping: (none)")
 
+    def _get_mapping_cached(self) -> Optional[dict]:
+        """Mapping of the current working dir; read from config once per working-dir switch."""
+        if not self.working_dir: return None
+        if self._mapping_cache is None:
+            self._mapping_cache = get_mapping(self.working_dir)
+        return self._mapping_cache
+
+    def _check_is_repo(self) -> bool:
+        """`is_repo(working_dir)`, probed once per working-dir switch (reset after init_repo)."""
+        if not self.working_dir: return False
+        if self._is_repo_cache is None:
+            self._is_repo_cache = is_repo(self.working_dir)
+        return self._is_repo_cache
+
     def _on_history_selection(self) -> None:
-        self.btn_restore.setEnabled(bool(self.history_list.selectedItems()))
+        self.btn_restore.setEnabled(self.history_list.selectionModel().hasSelection())
+
+    def _selected_inbox_row(self) -> Optional[InboxItem]:
+        rows = self.inbox_list.selectionModel().selectedRows()
+        return rows[0].data(Qt.UserRole) if rows else None
 
     def _on_inbox_selection(self) -> None:
-        has = bool(self.inbox_list.selectedItems())
+        has = self.inbox_list.selectionModel().hasSelection()
         self.btn_open_review.setEnabled(has); self.btn_pull_review.setEnabled(has)
-        self._load_comments_preview()
+        self._inbox_sel_timer.start()  # coalesce rapid selection changes (arrow-key scrolling)
 
     # ── Create / Open
     def create_new(self) -> None:
@@ -223,7 +284,7 @@ class StudentWindow(QMainWindow):
         except Exception as e: QMessageBox.critical(self, 'Init repository failed', f'Could not create repository at:\n{new_dir}\n\n{e}'); return
         if not is_repo(new_dir): QMessageBox.critical(self, 'Repository not found', f'Init succeeded but repo not detected at:\n{new_dir}'); return
         try:
-            c = repo_commit(new_dir, message=f'Initial snapshot: {name.strip()}')
+            c = repo_write_now(repo_commit, new_dir, message=f'Initial snapshot: {name.strip()}')
             self.statusBar().showMessage(f'Initialised repo and committed {c.id[:7]}', 4000)
         except Exception as e:
             QMessageBox.warning(self, 'Initial commit failed', f'Repository initialised but initial commit failed.\n\n{e}')
@@ -258,7 +319,7 @@ class StudentWindow(QMainWindow):
         resp = QMessageBox.question(self, "Initialise repository?", "This folder has no repository (.paperrepo). Do you want to initialise it now?", QMessageBox.Yes | QMessageBox.No)
         if resp == QMessageBox.Yes:
             try:
-                init_repo(path); repo_commit(path, message="Initial snapshot (auto)")
+                init_repo(path); repo_write_now(repo_commit, path, message="Initial snapshot (auto)")
             except Exception as e:
                 QMessageBox.critical(self, "Init repository failed", str(e)); return
             self.statusBar().showMessage("Repository initialised.", 3000); self._set_working_dir(path)
@@ -267,28 +328,31 @@ class StudentWindow(QMainWindow):
     def commit_snapshot(self) -> None:
         if not self.working_dir:
             QMessageBox.warning(self, "No manuscript", "Please select or create a manuscript folder first."); return
-        if not is_repo(self.working_dir): init_repo(self.working_dir)
+        if self._committing: self.statusBar().showMessage("A commit is already in progress…", 3000); return
+        if not self._check_is_repo(): init_repo(self.working_dir); self._is_repo_cache = None
         message, ok = QInputDialog.getText(self, "Commit message", "Describe your changes:", text="Checkpoint")
         if not ok or not message.strip(): return
-        c = repo_commit(self.working_dir, message=message.strip())
+        self._committing = True; self.statusBar().showMessage("Committing…")
+        run_repo_write(repo_commit, self.working_dir, message=message.strip(), on_done=self._commit_done, on_error=self._commit_failed)
+
+    def _commit_done(self, c) -> None:
+        self._committing = False
         self.statusBar().showMessage(f"Committed {c.id[:7]} at {int(c.timestamp)}", 5000); self._refresh_history()
 
+    def _commit_failed(self, msg: str) -> None:
+        self._committing = False; self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Commit failed", msg)
+
     def _refresh_history(self) -> None:
-        self.history_list.clear()
-        if not self.working_dir or not is_repo(self.working_dir): return
-        commits = repo_history(self.working_dir)
-        from datetime import datetime as _dt
-        for i, c in enumerate(commits):
-            title = c.message.splitlines()[0] if c.message else "(no message)"
-            when = _dt.fromtimestamp(c.timestamp).strftime("%Y-%m-%d %H:%M:%S")
-            text = f"{i + 1:02d} | {when} | {title} | {c.id[:12]}"
-            it = QListWidgetItem(text, self.history_list); it.setData(Qt.UserRole, c.id)
+        commits = repo_history(self.working_dir) if self._check_is_repo() else []
+        self._history_model.set_commits(commits)
+        self._on_history_selection()
 
     def restore_selected_commit(self) -> None:
         if not self.working_dir: return
-        items = self.history_list.selectedItems()
-        if not items: return
-        commit_id = items[0].data(Qt.UserRole)
+        rows = self.history_list.selectionModel().selectedRows()
+        if not rows: return
+        commit_id = rows[0].data(Qt.UserRole)
         box = QMessageBox(self); box.setWindowTitle("Restore working copy")
         box.setText("Do you want to CLEAN the working folder before restoring?\n\nYes = Clean (remove existing files except .paperrepo etc.)\nNo = Overlay (keep unrelated files, overwrite tracked ones)\nCancel = abort.")
         box.setStandardButtons(QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel); box.setDefaultButton(QMessageBox.No)
@@ -296,7 +360,7 @@ class StudentWindow(QMainWindow):
         if resp == QMessageBox.Cancel: return
         clean = resp == QMessageBox.Yes
         try:
-            written = repo_restore(self.working_dir, commit_id=commit_id, clean=clean)
+            written = repo_write_now(repo_restore, self.working_dir, commit_id=commit_id, clean=clean)
         except Exception as e:
             QMessageBox.critical(self, "Restore failed", str(e)); return
         self.statusBar().showMessage(f"Restored {written} file(s) from {commit_id[:12]}", 6000)
@@ -308,84 +372,85 @@ class StudentWindow(QMainWindow):
             QMessageBox.warning(self, "No manuscript", "Open a manuscript first."); return
         newmap = change_mapping(self, self.working_dir)
         if newmap:
+            self._mapping_cache = newmap
             self._update_mapping_label(); self.btn_refresh_inbox.setEnabled(True); self.refresh_inbox()
             QMessageBox.information(self, "Mapping updated", f'Now linked to:\n{newmap["students_root"]}\n{newmap["student_name"]}/{newmap["slug"]}')
 
     def _apply_inbox_filter(self) -> None:
-        q = (self.inbox_filter.text() or "").strip().lower()
-        for i in range(self.inbox_list.count()):
-            it = self.inbox_list.item(i)
-            it.setHidden(q not in it.text().lower())
+        # case-insensitive substring match over the row labels, done by the proxy in C++
+        self._inbox_proxy.setFilterFixedString((self.inbox_filter.text() or "").strip())
 
-    def refresh_inbox(self) -> None:
-        self.inbox_list.clear()
-        if self.comments_preview:
-            self.comments_preview.clear(); self.comments_preview.setPlaceholderText("No comments selected.")
-        if not self.working_dir: return
-        mapping = get_mapping(self.working_dir)
+    def refresh_inbox(self, force: bool = False) -> None:
+        """Rescan the inbox in the background; `force` (explicit Refresh) bypasses the scan cache."""
+        self._inbox_gen += 1  # results of any in-flight scan become stale
+        mapping = self._get_mapping_cached()
         if not mapping:
-            self.btn_open_review.setEnabled(False); return
-        from shared.paths import manuscript_root as _mr
-        mroot = _mr(Path(mapping["students_root"]), mapping["student_name"], mapping["slug"])
+            self._clear_inbox()
+            if self.working_dir: self.btn_open_review.setEnabled(False)
+            return
+        mroot = manuscript_root(Path(mapping["students_root"]), mapping["student_name"], mapping["slug"])
+        if mroot != self._current_mroot: self._clear_inbox()
         self._current_mroot = mroot
-        rows = scan_inbox(mroot)
-        count = 0
-        for row in rows:
-            text = f"Submission {row.sub_id} — {row.label}"
-            if row.when_label: text += f" · {row.when_label}"
-            if row.due_label:  text += f" · due: {row.due_label}"
-            it = QListWidgetItem(text, self.inbox_list)
-            it.setData(Qt.UserRole, row)  # store whole InboxItem
-            if row.overdue:
-                from PySide6.QtGui import QBrush, QColor, QFont
-                it.setForeground(QBrush(QColor("#B00020"))); f = QFont(self.font()); f.setBold(True); it.setFont(f)
-            count += 1
-        self.btn_open_review.setEnabled(count > 0); self._apply_inbox_filter()
+        gen = self._inbox_gen
+        self.statusBar().showMessage("Scanning inbox…")
+        run_in_pool(scan_inbox, mroot, use_cache=not force,
+                    on_done=lambda rows: self._populate_inbox(gen, rows),
+                    on_error=lambda msg: self._inbox_scan_failed(gen, msg))
+
+    def _clear_inbox(self) -> None:
+        self._inbox_model.clear(); self._preview_key = None
+        if self.comments_preview:
+            self.comments_preview.clear(); self.comments_preview.setPlaceholderText("No comments selected.")
+
+    def _populate_inbox(self, gen: int, rows: list[InboxItem]) -> None:
+        if gen != self._inbox_gen: return
+        self.statusBar().clearMessage()
+        if not self._inbox_model.set_rows(rows): return  # nothing changed since last scan
+        self.btn_open_review.setEnabled(bool(rows)); self._on_inbox_selection()
+
+    def _inbox_scan_failed(self, gen: int, msg: str) -> None:
+        if gen != self._inbox_gen: return
+        self.statusBar().showMessage(f"Inbox scan failed: {msg}", 6000)
 
     def _open_selected_review(self) -> None:
-        items = self.inbox_list.selectedItems()
-        if not items: return
-        row: InboxItem = items[0].data(Qt.UserRole)
-        open_review(self, row)
+        row = self._selected_inbox_row()
+        if row: open_review(self, row)
 
     def _pull_selected_review(self) -> None:
         if not self.working_dir:
             QMessageBox.warning(self, "No manuscript", "Please select or create a manuscript folder first."); return
-        items = self.inbox_list.selectedItems()
-        if not items: return
-        row: InboxItem = items[0].data(Qt.UserRole)
-        pull_review_to_working(self, self.working_dir, row)
+        row = self._selected_inbox_row()
+        if not row: return
+        pull_review_to_working(self, self.working_dir, row, on_committed=self._refresh_history)
 
     def _load_comments_preview(self) -> None:
+        row = self._selected_inbox_row()
+        cpath = row.comments_json if row else None
+        if not row: key = None
+        elif cpath is None: key = (row.sub_id, None, None)  # scan already found no comments.json: no stat
+        else:
+            try: st = cpath.stat(); key = (str(cpath), st.st_mtime_ns, st.st_size)
+            except OSError: key = (str(cpath), None, None)
+        if key is not None and key == self._preview_key: return  # same file already shown
+        self._preview_key = key
+        if row: run_in_pool(prefetch_file, row.file)  # hydrate cloud-only files before "Open"
         self.comments_preview.clear()
-        items = self.inbox_list.selectedItems()
-        if not items:
+        if not row:
             self.comments_preview.setPlaceholderText("No comments selected."); return
-        row: InboxItem = items[0].data(Qt.UserRole)
-        cpath = row.comments_json
-        if not cpath.exists():
+        if key[1] is None:
             self.comments_preview.setPlaceholderText("No comments.json found for this review."); return
-        try:
-            data = json.loads(cpath.read_text(encoding="utf-8"))
-        except Exception as e:
-            self.comments_preview.setPlainText(f"Failed to read comments.json:\n{e}"); return
-        general = (data.get("general") or "").strip()
-        items_list = data.get("items") or []
-        lines = []
-        if general: lines += ["GENERAL NOTES", "-------------", general, ""]
-        if items_list:
-            lines += ["ITEMISED COMMENTS", "-----------------"]
-            for i, it in enumerate(items_list, 1):
-                f = it.get("file", "")
-                ls = it.get("line_start", it.get("line", ""))
-                le = it.get("line_end", ls)
-                t = it.get("text", "")
-                loc = f"{f}:{ls}" if ls == le else f"{f}:{ls}-{le}"
-                lines.append(f"{i:02d}. {loc} — {t}")
-        if not lines:
+        text = self._comments_cache.get(key)
+        if text is None:
+            try:
+                text = _render_comments(read_json(cpath))
+            except Exception as e:
+                self.comments_preview.setPlainText(f"Failed to read comments.json:\n{e}"); return
+            if len(self._comments_cache) >= 64: self._comments_cache.pop(next(iter(self._comments_cache)))  # FIFO cap
+            self._comments_cache[key] = text
+        if not text:
             self.comments_preview.setPlaceholderText("No comments in this review.")
         else:
-            self.comments_preview.setPlainText("\n".join(lines))
+            self.comments_preview.setPlainText(text)
 
     # ── Submit (with CANCEL fix)
     def submit_to_supervisor(self) -> None:
@@ -393,8 +458,9 @@ class StudentWindow(QMainWindow):
             QMessageBox.warning(self, "No manuscript", "Please select or create a manuscript folder first."); return
 
         # ensure repo & at least one commit
+        head: Optional[str] = None  # threaded through to the manifest instead of re-reading HEAD
         try:
-            ensure_repo_ready(self.working_dir)
+            head = ensure_repo_ready(self.working_dir)
         except Exception:
             # best-effort – ignore
             pass
@@ -404,14 +470,15 @@ class StudentWindow(QMainWindow):
         if not ok:
             self.statusBar().showMessage("Submission cancelled.", 4000); return
         if message and message.strip():
-            repo_commit(self.working_dir, message=message.strip())
+            head = repo_write_now(repo_commit, self.working_dir, message=message.strip()).id
 
         # mapping (Cancel flow respected)
-        mapping = ensure_mapping(self, self.working_dir)
+        mapping = self._get_mapping_cached() or ensure_mapping(self, self.working_dir)
         if not mapping:
             self.statusBar().showMessage("Submission cancelled (no mapping).", 4000); return
+        self._mapping_cache = mapping
 
-        dest_root, submission_id = create_submission_package(self, self.working_dir, mapping, message)
+        dest_root, submission_id = create_submission_package(self, self.working_dir, mapping, message, commit_id=head)
         QMessageBox.information(self, "Submitted", f"Submission has been created:\n{submission_id}")
 
         # optional expected date
@@ -426,12 +493,13 @@ class StudentWindow(QMainWindow):
                     self.statusBar().showMessage("Expected date saved.", 4000)
                 except Exception as e:
                     QMessageBox.warning(self, "Set expected date failed", str(e))
+        invalidate_inbox_cache(dest_root)  # due.json may have been rewritten in place
         self.refresh_inbox()
 
     # Save window state
     def closeEvent(self, ev):
-        if hasattr(self, "_settings"):
-            self._settings.setValue("geometry", self.saveGeometry()); self._settings.setValue("state", self.saveState())
+        s = self._settings  # always created in __init__
+        s.setValue("geometry", self.saveGeometry()); s.setValue("state", self.saveState()); s.sync()
         super().closeEvent(ev)
 
 def main() -> None:
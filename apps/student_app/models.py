@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PySide6.QtGui import QBrush, QColor, QFont
+
+from shared.models import Commit
+
+from .data import InboxItem
+
+
+def _fmt_time(ts: float) -> str:
+    """Local `%Y-%m-%d %H:%M:%S` without building a datetime or going through strftime."""
+    t = time.localtime(ts)
+    return f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} {t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
+
+
+class HistoryModel(QAbstractListModel):
+    """Commits newest-first; row text is formatted only when Qt asks for it (visible rows)."""
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._commits: list[Commit] = []
+
+    def set_commits(self, commits: list[Commit]) -> None:
+        self.beginResetModel()
+        self._commits = list(commits)
+        self.endResetModel()
+
+    def commit_at(self, row: int) -> Optional[Commit]:
+        return self._commits[row] if 0 <= row < len(self._commits) else None
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._commits)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        c = self.commit_at(index.row()) if index.isValid() else None
+        if c is None:
+            return None
+        if role == Qt.DisplayRole:
+            title = c.message.partition("\n")[0].rstrip("\r") if c.message else "(no message)"  # first line, no list
+            return f"{index.row() + 1:02d} | {_fmt_time(c.timestamp)} | {title} | {c.id[:12]}"
+        if role == Qt.UserRole:
+            return c.id
+        return None
+
+
+def inbox_label(row: InboxItem) -> str:
+    text = f"Submission {row.sub_id} — {row.label}"
+    if row.when_label: text += f" · {row.when_label}"
+    if row.due_label:  text += f" · due: {row.due_label}"
+    return text
+
+
+class InboxModel(QAbstractListModel):
+    """Inbox rows as parallel lists (item / label / overdue); overdue rows share one red brush and bold font."""
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._rows: list[InboxItem] = []
+        self._labels: list[str] = []
+        self._overdue: list[bool] = []
+        self._brush = QBrush(QColor("#B00020"))
+        self._bold = QFont(); self._bold.setBold(True)
+
+    def set_rows(self, rows: list[InboxItem]) -> bool:
+        """Diff against the current rows: drop gone/changed ones, insert new ones in place.
+
+        Unchanged rows keep their indexes (and so the selection). Returns False when nothing changed.
+        """
+        if rows == self._rows:
+            return False
+        new = {r.sub_id: r for r in rows}
+        for i in reversed(range(len(self._rows))):
+            if new.get(self._rows[i].sub_id) != self._rows[i]:
+                self.beginRemoveRows(QModelIndex(), i, i)
+                del self._rows[i], self._labels[i], self._overdue[i]
+                self.endRemoveRows()
+        for i, r in enumerate(rows):
+            if i >= len(self._rows) or self._rows[i].sub_id != r.sub_id:
+                self.beginInsertRows(QModelIndex(), i, i)
+                self._rows.insert(i, r); self._labels.insert(i, inbox_label(r)); self._overdue.insert(i, r.overdue)
+                self.endInsertRows()
+        return True
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._rows, self._labels, self._overdue = [], [], []
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        i = index.row()
+        if role == Qt.DisplayRole:
+            return self._labels[i]
+        if role == Qt.UserRole:
+            return self._rows[i]
+        if role == Qt.ForegroundRole:
+            return self._brush if self._overdue[i] else None
+        if role == Qt.FontRole:
+            return self._bold if self._overdue[i] else None
+        return None
@@ -1,9 +1,11 @@
 # ui/review_viewer.py
+import html
 import os
+from functools import lru_cache
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-from PySide6.QtCore import Qt, QTimer, QUrl
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, QUrl
 from PySide6.QtGui import QAction, QDesktopServices, QKeySequence
 from PySide6.QtWidgets import (
     QDialog,
@@ -11,7 +13,6 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QListWidget,
-    QListWidgetItem,
     QMessageBox,
     QPushButton,
     QSizePolicy,
@@ -21,8 +22,7 @@ from PySide6.QtWidgets import (
     QTabWidget,
     QTextEdit,
     QToolBar,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QVBoxLayout,
     QWidget,
 )
@@ -54,9 +54,25 @@ class ReviewData:
     comments: Optional[List[str]] = None
     items: Optional[List[ReviewItem]] = None
     build_log: Optional[str] = ""
+    build_log_path: Optional[str] = None  # read lazily when the Build log tab is first shown
     sources: Optional[List[Tuple[str, str]]] = None  # (label, filepath)
 
 
+LOG_TAIL_BYTES = 512 * 1024  # only the end of a huge latexmk log is worth laying out
+
+
+@lru_cache(maxsize=16)
+def _read_log_tail(path: str, mtime_ns: int, size: int) -> str:
+    """Last LOG_TAIL_BYTES of a log; (mtime_ns, size) are part of the key so a rewritten log is re-read."""
+    with open(path, "rb") as f:
+        if size <= LOG_TAIL_BYTES:
+            return f.read().decode("utf-8", errors="ignore")
+        f.seek(-LOG_TAIL_BYTES, os.SEEK_END)
+        tail = f.read().decode("utf-8", errors="ignore")
+    tail = tail.partition("\n")[2]  # drop the partial first line
+    return f"… (truncated: showing the last {LOG_TAIL_BYTES // 1024} KB of {size // 1024} KB) …\n{tail}"
+
+
 def _status_color(status: str) -> str:
     s = status.strip().lower()
     if s.startswith("return"): return "#b45309"   # amber-700
@@ -66,12 +82,64 @@ def _status_color(status: str) -> str:
     return "#334155"  # slate-700
 
 
+class _RowsModel(QAbstractTableModel):
+    """Read-only table over a plain list of row tuples; cells are produced by `_cell` only when a view asks."""
+
+    headers: Tuple[str, ...] = ()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list = []
+
+    def set_rows(self, rows: Optional[list]):
+        self.beginResetModel()
+        self._rows = list(rows or [])
+        self.endResetModel()
+
+    def _cell(self, row, col: int) -> str:
+        return str(row[col])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self._cell(self._rows[index.row()], index.column())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+
+class ReviewItemsModel(_RowsModel):
+    headers = ("File:Line(s)", "Message")
+
+    def _cell(self, row: ReviewItem, col: int) -> str:
+        return f"{row.file}:{row.lines}" if col == 0 else row.message
+
+
+class SourcesModel(_RowsModel):
+    headers = ("Source", "Path")  # rows are (source, path) tuples: the default _cell fits
+
+
+def _table_view(model: _RowsModel) -> QTreeView:
+    view = QTreeView(); view.setModel(model)
+    view.setRootIsDecorated(False); view.setUniformRowHeights(True)
+    return view
+
+
 class ReviewDialog(QDialog):
     def __init__(self, review: ReviewData, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Review")
         self.setMinimumSize(1100, 740)
         self.review = review
+        self._status_bg = _status_color(review.status)  # shared by the header badge and the overview
 
         root = QVBoxLayout(self)
         # Header
@@ -100,6 +168,8 @@ class ReviewDialog(QDialog):
 
         self._apply_styles()
         self._load_data()
+        # Parse the PDF after the first paint so the header/sidebar show immediately
+        QTimer.singleShot(0, self._load_pdf)
 
     # ---------- UI pieces ----------
     def _build_header(self) -> QWidget:
@@ -118,7 +188,7 @@ class ReviewDialog(QDialog):
         status.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         status.setFixedHeight(32)          # ← badge không còn cao
         status.setMinimumWidth(100)        # ← để chữ không bị dọc
-        status.setStyleSheet(f"background:{_status_color(self.review.status)};")
+        status.setStyleSheet(f"background:{self._status_bg};")
 
         btnOpen = QPushButton("Open PDF")
         btnOpen.clicked.connect(self._open_pdf_external)
@@ -215,23 +285,27 @@ class ReviewDialog(QDialog):
         tabs.addTab(self.comments, "Comments")
 
         # Itemised
-        self.items = QTreeWidget(); self.items.setHeaderLabels(["File:Line(s)", "Message"])
+        self.itemsModel = ReviewItemsModel(self)
+        self.items = _table_view(self.itemsModel)
         tabs.addTab(self.items, "Itemised")
 
         # Build log
         self.buildLog = QTextEdit(); self.buildLog.setReadOnly(True); self.buildLog.setLineWrapMode(QTextEdit.NoWrap)
+        self.buildLog.setUndoRedoEnabled(False)  # read-only: no undo stack for a large document
+        self._log_loaded = False
         tabs.addTab(self.buildLog, "Build log")
+        tabs.currentChanged.connect(self._on_tab_changed)
 
         # Sources
-        self.srcTree = QTreeWidget(); self.srcTree.setHeaderLabels(["Source", "Path"])
+        self.srcModel = SourcesModel(self)
+        self.srcTree = _table_view(self.srcModel)
         tabs.addTab(self.srcTree, "Source files")
 
         v.addWidget(tabs, 1)
         return side
 
     # ---------- data & behaviors ----------
-    def _load_data(self):
-        # PDF
+    def _load_pdf(self):
         if self.review.pdf_path:
             if _pdf_ok:
                 self.doc.load(self._as_url(self.review.pdf_path).toLocalFile())
@@ -244,29 +318,41 @@ class ReviewDialog(QDialog):
         else:
             QMessageBox.information(self, "No PDF", "This review has no PDF attached.")
 
+    def _load_data(self):
         # Overview
-        status_mark = f'<span style="background:{_status_color(self.review.status)};color:#fff;border-radius:6px;padding:2px 6px">{self.review.status}</span>'
-        notes = (self.review.general_notes or "").replace("\n", "<br>")
-        self.overview.setHtml(f"<h3 style='margin-top:0'>{self.review.title}</h3>{status_mark}<hr>{notes}")
+        status_mark = f'<span style="background:{self._status_bg};color:#fff;border-radius:6px;padding:2px 6px">{html.escape(self.review.status)}</span>'
+        notes = "<br>".join(html.escape(ln) for ln in (self.review.general_notes or "").splitlines())
+        self.overview.setHtml(f"<h3 style='margin-top:0'>{html.escape(self.review.title)}</h3>{status_mark}<hr>{notes}")
 
         # Comments
-        self.comments.clear()
-        for c in (self.review.comments or []):
-            QListWidgetItem(c, self.comments)
+        c = self.comments
+        c.setUpdatesEnabled(False); c.blockSignals(True); c.setSortingEnabled(False)
+        try:
+            c.clear(); c.addItems([str(x) for x in (self.review.comments or [])])
+        finally:
+            c.blockSignals(False); c.setUpdatesEnabled(True)
 
         # Items
-        self.items.clear()
-        for it in (self.review.items or []):
-            row = QTreeWidgetItem([f"{it.file}:{it.lines}", it.message])
-            self.items.addTopLevelItem(row)
+        self.itemsModel.set_rows(self.review.items)
 
-        # Build log
-        self.buildLog.setPlainText(self.review.build_log or "")
+        # Build log: inline text now; a log file only when its tab is first shown
+        if not self.review.build_log_path:
+            self.buildLog.setPlainText(self.review.build_log or ""); self._log_loaded = True
 
         # Sources
-        self.srcTree.clear()
-        for label, path in (self.review.sources or []):
-            self.srcTree.addTopLevelItem(QTreeWidgetItem([label, path]))
+        self.srcModel.set_rows(self.review.sources)
+
+    def _on_tab_changed(self, idx: int):
+        if self._log_loaded or self.tabs.widget(idx) is not self.buildLog:
+            return
+        self._log_loaded = True
+        path = self.review.build_log_path
+        try:
+            st = os.stat(path)
+            text = _read_log_tail(path, st.st_mtime_ns, st.st_size)
+        except OSError as e:
+            text = f"(Failed to read build log: {e})"
+        self.buildLog.setPlainText(text)
 
     # ---------- helpers ----------
     def _as_url(self, path: str) -> QUrl:
@@ -341,7 +427,7 @@ class ReviewDialog(QDialog):
         QToolBar { background:#ffffff; border-bottom:1px solid #e5e7eb; padding:4px; }
         QTabWidget::pane { border:1px solid #e5e7eb; background:white; }
         QTabBar::tab { padding:8px 12px; }
-        QListWidget, QTreeWidget, QTextEdit { background:white; border:1px solid #e5e7eb; }
+        QListWidget, QTreeView, QTextEdit { background:white; border:1px solid #e5e7eb; }
         """)
 
 
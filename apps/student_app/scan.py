@@ -1,71 +1,226 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Tuple
 
-from shared.due import is_overdue_iso, read_return_due
-from shared.events import get_submission_times
+from appdirs import user_cache_dir
+
+from shared.config import APP_AUTHOR, APP_NAME
+from shared.due import is_overdue_iso
+from shared.events import get_all_submission_times
+from shared.jsonio import dumps_json, read_json
 from shared.timeutil import iso_to_local_str
 
 from .data import InboxItem
 
 
-def _pick_target_file(subdir: Path) -> tuple[Optional[Path], Optional[str]]:
-    docx = subdir / "returned.docx"
-    doc  = subdir / "returned.doc"
-    rhtml = subdir / "returned.html"
-    html  = subdir / "review.html"
-    if docx.exists():  return docx, "returned.docx"
-    if doc.exists():   return doc,  "returned.doc"
-    if rhtml.exists(): return rhtml, "returned.html"
-    if html.exists():  return html,  "review.html"
+_TARGETS = ("returned.docx", "returned.doc", "returned.html", "review.html")
+
+def _list_review_dir(subdir: Path) -> dict[str, os.DirEntry]:
+    """Files of one review folder by lower-cased name: a single scandir answers every exists() question."""
+    try:
+        with os.scandir(subdir) as it:
+            return {e.name.lower(): e for e in it if e.is_file(follow_symlinks=False)}
+    except OSError:
+        return {}
+
+def _pick_target_file(present: dict[str, os.DirEntry]) -> tuple[Optional[Path], Optional[str]]:
+    for name in _TARGETS:
+        if name in present:
+            return Path(present[name].path), name
     return None, None
 
-def scan_inbox(manuscript_root: Path) -> list[InboxItem]:
-    """Scan `…/reviews/*` and build inbox rows."""
+@lru_cache(maxsize=2048)
+def _read_due(path: str, mtime_ns: int, size: int) -> dict:
+    """Parsed due.json; the (mtime_ns, size) key makes an edited file miss the cache. Do not mutate."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+@lru_cache(maxsize=8)
+def _submission_times(events_dir: str, mtime_ns: int) -> dict:
+    """get_all_submission_times per events-dir state (event files are write-once, so adding one bumps the mtime)."""
+    return get_all_submission_times(Path(events_dir))
+
+# manuscript root -> ((reviews mtime_ns, events mtime_ns), index of the last full scan, its rows)
+_INBOX_CACHE: dict[Path, tuple[tuple[int, int], dict, list[InboxItem]]] = {}
+
+def invalidate_inbox_cache(manuscript_root: Optional[Path] = None) -> None:
+    """Forget cached scans (all of them when `manuscript_root` is None) and the per-file memos."""
+    if manuscript_root is None:
+        _INBOX_CACHE.clear()
+    else:
+        _INBOX_CACHE.pop(manuscript_root, None)
+    _read_due.cache_clear(); _submission_times.cache_clear()
+
+def _mtime_ns(p: Path) -> int:
+    try:
+        return p.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+def scan_inbox(manuscript_root: Path, *, use_cache: bool = True) -> list[InboxItem]:
+    """Scan `…/reviews/*` and build inbox rows.
+
+    While neither `reviews/` nor `events/` has changed (no review folder or event added/removed)
+    and every review folder still has its stamp, the previous rows are reused; only their overdue
+    flag is re-evaluated against the clock.
+    Across runs, folders whose stamp matches the per-user index are not listed again.
+    """
     reviews = manuscript_root / "reviews"
     events_dir = manuscript_root / "events"
-    out: list[InboxItem] = []
-    if not reviews.exists():
-        return out
-
-    for subdir in sorted((p for p in reviews.iterdir() if p.is_dir()),
-                         key=lambda p: p.name, reverse=True):
-        sub_id = subdir.name
-        target, label = _pick_target_file(subdir)
-        if not target:
+    key = (_mtime_ns(reviews), _mtime_ns(events_dir))
+    hit = _INBOX_CACHE.get(manuscript_root) if use_cache else None
+    if hit and hit[0] == key and all(_folder_stamp(str(reviews / name)) == ent[0]
+                                     for name, ent in hit[1].items()):
+        return [replace(r, overdue=True) if r.due_iso and not r.overdue and is_overdue_iso(r.due_iso) else r
+                for r in hit[2]]
+    index, out = _scan_reviews(manuscript_root, reviews, events_dir, key[1], use_index=use_cache)
+    _INBOX_CACHE[manuscript_root] = (key, index, out)
+    return list(out)
+
+# ── on-disk index ────────────────────────────────────────────────────────
+# sub_id -> [folder stamp, record or None]. A record holds what a folder listing + due.json read
+# yield, with file names relative to the folder; labels and paths are rebuilt on load.
+# It is a per-user cache, so it lives in the local cache dir rather than the synced manuscript tree.
+_INDEX_DIR = Path(user_cache_dir(APP_NAME, APP_AUTHOR)) / "inbox_index"
+
+def _index_file(manuscript_root: Path) -> Path:
+    key = hashlib.blake2b(os.path.abspath(manuscript_root).encode("utf-8"), digest_size=8).hexdigest()
+    return _INDEX_DIR / f"{key}.json"
+
+def load_index(manuscript_root: Path) -> dict:
+    try:
+        data = read_json(_index_file(manuscript_root))
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def save_index(manuscript_root: Path, index: dict) -> None:
+    # temp file + os.replace: a forced refresh can run a second scan while the first is still saving;
+    # each writes its own temp file, so the index is always one scan's complete result
+    f = _index_file(manuscript_root)
+    tmp = f.with_name(f"{f.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        _INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(dumps_json(index))
+        os.replace(tmp, f)
+    except OSError:
+        try: tmp.unlink()
+        except OSError: pass
+
+def _folder_stamp(folder: str) -> Optional[list[int]]:
+    """[folder mtime_ns, due.json mtime_ns, size, comments.json mtime_ns, size], -1 when a file is missing.
+
+    Adding or removing a file bumps the folder mtime, but due.json is rewritten in place
+    (write_return_due), which only its own stat shows. None if the folder is gone.
+    """
+    try:
+        stamp = [os.stat(folder).st_mtime_ns]
+    except OSError:
+        return None
+    for name in ("due.json", "comments.json"):
+        try:
+            st = os.stat(os.path.join(folder, name)); stamp += [st.st_mtime_ns, st.st_size]
+        except OSError:
+            stamp += [-1, -1]
+    return stamp
+
+def _scan_reviews(manuscript_root: Path, reviews: Path, events_dir: Path, events_mtime_ns: int,
+                  *, use_index: bool = True) -> tuple[dict, list[InboxItem]]:
+    """(index, rows) for the review folders under `reviews`."""
+    try:
+        with os.scandir(reviews) as it:
+            subdirs = sorted((e for e in it if e.is_dir(follow_symlinks=False)),
+                             key=lambda e: e.name, reverse=True)
+    except OSError:
+        return {}, []
+
+    old = load_index(manuscript_root) if use_index else {}
+    index: dict = {}
+    stale: list[os.DirEntry] = []
+    for e in subdirs:
+        stamp = _folder_stamp(e.path)
+        if stamp is None:
             continue
+        hit = old.get(e.name)
+        if isinstance(hit, list) and len(hit) == 2 and hit[0] == stamp:
+            index[e.name] = hit
+        else:
+            index[e.name] = [stamp, None]; stale.append(e)
+
+    if len(stale) < 4:
+        recs = [_probe(e) for e in stale]
+    else:  # per-folder work is independent and latency-bound on synced/network roots
+        with ThreadPoolExecutor(max_workers=min(16, len(stale))) as ex:
+            recs = list(ex.map(_probe, stale))
+    for e, rec in zip(stale, recs):
+        index[e.name][1] = rec
+    if index != old:
+        save_index(manuscript_root, index)
+
+    if not any(v[1] for v in index.values()):
+        return index, []
+    times = _submission_times(str(events_dir), events_mtime_ns)
+    return index, [_to_item(reviews / e.name, index[e.name][1], times)
+                   for e in subdirs if e.name in index and index[e.name][1]]
+
+def _probe(entry: os.DirEntry) -> Optional[dict]:
+    present = _list_review_dir(Path(entry.path))
+    target, label = _pick_target_file(present)
+    if not target:
+        return None
+    due_iso = ""
+    due = present.get("due.json")
+    if due is not None:
+        try:
+            st = due.stat()
+            due_iso = (_read_due(due.path, st.st_mtime_ns, st.st_size).get("return_due") or "").strip()
+        except OSError:
+            pass
+    return {
+        "file": target.name,
+        "label": label or target.name,
+        "comments_json": present["comments.json"].name if "comments.json" in present else None,
+        "due_iso": due_iso or None,
+    }
+
+def _to_item(folder: Path, rec: dict, times: dict) -> InboxItem:
+    sub_id = folder.name
+    sub_ts, ret_ts = times.get(sub_id, (None, None))
+    when_label = ""
+    if ret_ts:
+        when_label = f"returned {iso_to_local_str(ret_ts)}"
+    elif sub_ts:
+        when_label = f"submitted {iso_to_local_str(sub_ts)}"
+
+    raw_iso = rec.get("due_iso") or ""
+    due_label = ""
+    overdue = False
+    if raw_iso:
+        try:
+            due_label = iso_to_local_str(raw_iso)
+            overdue = is_overdue_iso(raw_iso)
+        except Exception:
+            due_label = raw_iso
 
-        sub_ts, ret_ts = get_submission_times(events_dir, sub_id)
-        when_label = ""
-        if ret_ts:
-            when_label = f"returned {iso_to_local_str(ret_ts)}"
-        elif sub_ts:
-            when_label = f"submitted {iso_to_local_str(sub_ts)}"
-
-        # due (optional)
-        due_data = read_return_due(manuscript_root, sub_id)
-        raw_iso = (due_data.get("return_due") or "").strip()
-        due_label = ""
-        overdue = False
-        if raw_iso:
-            try:
-                due_label = iso_to_local_str(raw_iso)
-                overdue = is_overdue_iso(raw_iso)
-            except Exception:
-                due_label = raw_iso
-
-        out.append(
-            InboxItem(
-                sub_id=sub_id,
-                file=target,
-                label=label or target.name,
-                comments_json=target.parent / "comments.json",
-                when_label=when_label,
-                due_iso=(raw_iso or None),
-                due_label=due_label,
-                overdue=overdue,
-            )
-        )
-    return out
+    cjson = rec.get("comments_json")
+    return InboxItem(
+        sub_id=sub_id,
+        file=folder / rec["file"],
+        label=rec["label"],
+        comments_json=folder / cjson if cjson else None,
+        when_label=when_label,
+        due_iso=(raw_iso or None),
+        due_label=due_label,
+        overdue=overdue,
+    )
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-import json
-import shutil
-from dataclasses import asdict
+import os
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 from time import time
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
-from PySide6.QtWidgets import QMessageBox, QWidget
+from PySide6.QtCore import QThreadPool, QTimer
+from PySide6.QtWidgets import QHBoxLayout, QLabel, QMessageBox, QPushButton, QWidget
 
 from apps.student_app.review_viewer import ReviewData, ReviewItem, open_review_dialog
 
@@ -19,41 +20,80 @@ from paperrepo.repo import history as repo_history
 from paperrepo.repo import restore as repo_restore
 
 # shared
+from shared.config import get_mapping
 from shared.detect import detect_manuscript_type
 from shared.due import write_return_due
 from shared.events import new_submission_event, utcnow_iso, write_event
+from shared.jsonio import read_json, write_json
 from shared.models import Manifest
-from shared.osutil import open_with_default_app
+from shared.osutil import copy_files, iter_files, open_with_default_app
 from shared.paths import manuscript_root, manuscript_subdirs, slugify
 from shared.timeutil import iso_to_local_str
+from shared.ui.tasks import run_in_pool
 
 from .data import InboxItem
 from .dialogs import prompt_due_datetime, prompt_mapping
 
 
+# never copied into a submission payload (at any depth)
+_PAYLOAD_SKIP = frozenset({".paperrepo", "submissions", "reviews", "events"})
+
 def write_minimal_paper_yaml(dst: Path, title: str, journal: str = "") -> None:
     data = {"title": title, "journal": journal, "authors": [], "status": "draft"}
-    (dst / "paper.yaml").write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(dst / "paper.yaml", data)
+
+_paper_cfg_cache: dict[Path, tuple[int, dict]] = {}  # paper.yaml path -> (mtime_ns, parsed)
+
+def _read_paper_cfg(working_dir: Path) -> dict:
+    """Parsed paper.yaml (JSON content); re-read only when the file's mtime changes."""
+    p = working_dir / "paper.yaml"
+    mtime = p.stat().st_mtime_ns
+    hit = _paper_cfg_cache.get(p)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    cfg = read_json(p)
+    _paper_cfg_cache[p] = (mtime, cfg)
+    return cfg
+
+# ── repo writes ──────────────────────────────────────────────────────────
+# repo.commit reads HEAD, writes the commit, then HEAD: two overlapping writes would drop a commit
+# from history. Every commit/restore therefore goes through one single-thread pool, in order.
+_REPO_POOL: Optional[QThreadPool] = None
+
+def _repo_pool() -> QThreadPool:
+    global _REPO_POOL
+    if _REPO_POOL is None:
+        _REPO_POOL = QThreadPool(); _REPO_POOL.setMaxThreadCount(1)
+    return _REPO_POOL
 
-def ensure_repo_ready(working_dir: Path) -> None:
+def run_repo_write(fn: Callable, *args, on_done: Optional[Callable] = None,
+                   on_error: Optional[Callable[[str], None]] = None, **kwargs) -> None:
+    """Queue a repo write behind the pending ones; `on_done` / `on_error` run on the GUI thread."""
+    run_in_pool(fn, *args, on_done=on_done, on_error=on_error, pool=_repo_pool(), **kwargs)
+
+def repo_write_now(fn: Callable, *args, **kwargs):
+    """Run a repo write on the GUI thread once the queued ones have finished; returns its result."""
+    _repo_pool().waitForDone()
+    return fn(*args, **kwargs)
+
+def ensure_repo_ready(working_dir: Path) -> str:
+    """Make sure the repo exists and has a commit; return the HEAD commit id."""
     if not is_repo(working_dir):
         init_repo(working_dir)
-    if not head_commit_id(working_dir):
-        repo_commit(working_dir, message="Initial snapshot (auto)")
+    return head_commit_id(working_dir) or repo_write_now(repo_commit, working_dir, message="Initial snapshot (auto)").id
 
 def ensure_mapping(parent: QWidget, working_dir: Path) -> Optional[dict]:
-    from shared.config import get_mapping
     m = get_mapping(working_dir)
     if m:
         return m
     return prompt_mapping(parent, working_dir, preset=None)
 
 def change_mapping(parent: QWidget, working_dir: Path) -> Optional[dict]:
-    from shared.config import get_mapping
     current = get_mapping(working_dir) or {}
     return prompt_mapping(parent, working_dir, preset=current)
 
-def create_submission_package(parent: QWidget, working_dir: Path, mapping: dict, commit_message: Optional[str]) -> tuple[Path, str]:
+def create_submission_package(parent: QWidget, working_dir: Path, mapping: dict, commit_message: Optional[str],
+                              commit_id: Optional[str] = None) -> tuple[Path, str]:
     """Create `submissions/<id>/payload` and manifest/events. Return (dest_root, submission_id)."""
     dest_root = manuscript_root(Path(mapping["students_root"]), mapping["student_name"], mapping["slug"])
     subs = manuscript_subdirs(dest_root)
@@ -61,21 +101,17 @@ def create_submission_package(parent: QWidget, working_dir: Path, mapping: dict,
     dest = subs["submissions"] / submission_id
     payload = dest / "payload"; payload.mkdir(parents=True, exist_ok=True)
 
-    for p in working_dir.rglob("*"):
-        if p.is_dir(): 
-            continue
-        rel = p.relative_to(working_dir)
-        if any(part in {".paperrepo", "submissions", "reviews", "events"} for part in rel.parts):
-            continue
-        (payload / rel).parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(p, payload / rel)
+    jobs = [(src, payload / rel) for src, rel in iter_files(working_dir, skip_dirs=_PAYLOAD_SKIP)]
+    for d in sorted({dst.parent for _, dst in jobs} - {payload}):  # mkdir here, not on the workers
+        d.mkdir(parents=True, exist_ok=True)
+    copy_files(jobs)
 
     mtype = detect_manuscript_type(payload)
 
     # journal (optional)
     journal_val = None
     try:
-        paper_cfg = json.loads((working_dir / "paper.yaml").read_text(encoding="utf-8"))
+        paper_cfg = _read_paper_cfg(working_dir)
         journal_val = (paper_cfg.get("journal") or "").strip() or None
     except Exception:
         pass
@@ -83,7 +119,7 @@ def create_submission_package(parent: QWidget, working_dir: Path, mapping: dict,
     manifest = Manifest(
         manuscript_title=working_dir.name,
         manuscript_type=mtype,
-        commit_id=(head_commit_id(working_dir) or ""),
+        commit_id=(commit_id or head_commit_id(working_dir) or ""),
         created_at=time(),
         student_name=mapping["student_name"],
         manuscript_slug=mapping["slug"],
@@ -91,10 +127,26 @@ def create_submission_package(parent: QWidget, working_dir: Path, mapping: dict,
         submitted_at=utcnow_iso(),
         journal=journal_val,
     )
-    (dest / "manifest.json").write_text(json.dumps(asdict(manifest), ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(dest / "manifest.json", vars(manifest))  # Manifest is flat: no need for asdict's recursive deep copy
     write_event(subs["events"], new_submission_event(submission_id))
     return dest_root, submission_id
 
+@lru_cache(maxsize=64)
+def _load_comments_cached(path: str, mtime_ns: int, size: int) -> dict:
+    """Decoded comments.json; reopening an unchanged review skips the read + parse. Do not mutate."""
+    return read_json(Path(path))
+
+def _find_tex(folder: Path, limit: int) -> list[str]:
+    """Up to `limit` .tex paths: top-level ones if any, else the first found by a lazy recursive walk."""
+    try:
+        with os.scandir(folder) as it:
+            top = [e.path for e in it if e.name.lower().endswith(".tex") and e.is_file()]
+    except OSError:
+        return []
+    if top:
+        return top[:limit]
+    return list(islice((p for p, _ in iter_files(folder) if p.lower().endswith(".tex")), limit))
+
 def open_review(parent: QWidget, item: InboxItem) -> None:
     sel_path = item.file
     if not sel_path.exists():
@@ -120,9 +172,10 @@ def open_review(parent: QWidget, item: InboxItem) -> None:
     comments_list = []
     item_objs: list[ReviewItem] = []
     cjson = item.comments_json
-    if cjson.exists():
+    if cjson is not None:
         try:
-            d = json.loads(cjson.read_text(encoding="utf-8"))
+            st = cjson.stat()
+            d = _load_comments_cached(str(cjson), st.st_mtime_ns, st.st_size)
             general_notes = d.get("general") or ""
             comments_list = d.get("comments") or []
             for it in (d.get("items") or []):
@@ -135,20 +188,14 @@ def open_review(parent: QWidget, item: InboxItem) -> None:
         except Exception as e:
             general_notes = f"(Failed to parse comments.json: {e})"
 
-    build_log = ""
+    build_log_path = None  # the dialog reads it only if the Build log tab is opened
     for cand in ("build.log", "latexmk.log", "pdflatex.log", "log.txt"):
         p = folder / cand
         if p.exists():
-            try:
-                build_log = p.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                pass
+            build_log_path = str(p)
             break
 
-    sources: list[tuple[str, str]] = []
-    texs = list(folder.glob("*.tex")) or list(folder.glob("**/*.tex"))
-    for p in texs[:30]:
-        sources.append((p.name, str(p)))
+    sources = [(os.path.basename(p), p) for p in _find_tex(folder, limit=30)]
 
     review = ReviewData(
         title=f"Review — submission {item.sub_id}",
@@ -158,7 +205,7 @@ def open_review(parent: QWidget, item: InboxItem) -> None:
         general_notes=general_notes,
         comments=comments_list,
         items=item_objs,
-        build_log=build_log,
+        build_log_path=build_log_path,
         sources=sources,
     )
 
@@ -172,7 +219,8 @@ def open_review(parent: QWidget, item: InboxItem) -> None:
 
     open_review_dialog(parent, review)
 
-def pull_review_to_working( parent: QWidget, working_dir: Path, item: InboxItem) -> None:
+def pull_review_to_working(parent: QWidget, working_dir: Path, item: InboxItem,
+                           on_committed: Optional[Callable[[], None]] = None) -> None:
     src = item.file
     if not src.exists():
         QMessageBox.warning(parent, "Missing file", f"Review file not found:\n{src}")
@@ -181,23 +229,47 @@ def pull_review_to_working( parent: QWidget, working_dir: Path, item: InboxItem)
     dest_dir.mkdir(parents=True, exist_ok=True)
     dest = dest_dir / f"returned{src.suffix.lower()}"
     try:
-        shutil.copy2(src, dest)
-        if item.comments_json.exists():
-            shutil.copy2(item.comments_json, dest_dir / "comments.json")
+        # fast_copy: data + one utime instead of copy2's copystat (xattrs/flags are extra round-trips on OneDrive)
+        jobs = [(str(src), dest)]
+        if item.comments_json is not None:
+            jobs.append((str(item.comments_json), dest_dir / "comments.json"))
+        copy_files(jobs)
     except Exception as e:
         QMessageBox.critical(parent, "Save failed", str(e)); return
 
-    resp = QMessageBox.question(
-        parent,
-        "Create checkpoint?",
-        "A copy of the review has been saved locally.\n\n"
-        "Do you want to create a checkpoint to record this in history?",
-        QMessageBox.Yes | QMessageBox.No,
-    )
-    if resp == QMessageBox.Yes:
-        try:
-            repo_commit(working_dir, message=f"Save supervisor review for submission {item.sub_id}")
-        except Exception:
-            pass
     parent.statusBar().showMessage(f"Saved review to: {dest}", 6000)
-    QMessageBox.information(parent, "Saved", f"Review saved to:\n{dest}")
+    _offer_checkpoint(parent, working_dir, f"Save supervisor review for submission {item.sub_id}", on_committed)
+
+def _offer_checkpoint(parent: QWidget, working_dir: Path, message: str,
+                      on_committed: Optional[Callable[[], None]] = None, *, timeout_ms: int = 10_000) -> None:
+    """Non-modal status-bar banner; the checkpoint is auto-confirmed after `timeout_ms`.
+
+    A pending banner is replaced rather than stacked: the commit snapshots the whole working copy,
+    so the newest one also covers the earlier review.
+    """
+    sb = parent.statusBar()
+    old = sb.findChild(QWidget, "checkpointBanner")
+    if old is not None and hasattr(old, "dismiss"): old.dismiss()
+    banner = QWidget(sb); banner.setObjectName("checkpointBanner"); lay = QHBoxLayout(banner); lay.setContentsMargins(0, 0, 0, 0)
+    lay.addWidget(QLabel("Create a checkpoint for this review?", banner))
+    btn_ok = QPushButton("Confirm checkpoint", banner); btn_skip = QPushButton("Skip", banner)
+    lay.addWidget(btn_ok); lay.addWidget(btn_skip)
+    timer = QTimer(banner); timer.setSingleShot(True)
+    closed = [False]
+
+    def _close() -> bool:
+        if closed[0]: return False
+        closed[0] = True; timer.stop(); sb.removeWidget(banner); banner.setObjectName(""); banner.deleteLater()
+        return True
+
+    def _confirm() -> None:
+        if not _close(): return
+        def _done(c) -> None:
+            sb.showMessage(f"Checkpoint {c.id[:7]} created.", 4000)
+            if on_committed: on_committed()
+        run_repo_write(repo_commit, working_dir, message=message, on_done=_done,
+                       on_error=lambda msg: sb.showMessage(f"Checkpoint failed: {msg}", 6000))
+
+    banner.dismiss = _close
+    btn_ok.clicked.connect(_confirm); btn_skip.clicked.connect(_close); timer.timeout.connect(_confirm)
+    sb.insertPermanentWidget(0, banner); timer.start(timeout_ms)
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-import json
+import codecs
+import hashlib
+import os
+import shlex
 import shutil
-import subprocess
 import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
-from PySide6.QtCore import QSize, Qt
-from PySide6.QtGui import QAction, QFont, QKeySequence
+from PySide6.QtCore import QProcess, QProcessEnvironment, QSize, QSortFilterProxyModel, Qt, QTimer
+from PySide6.QtGui import QAction, QFont, QKeySequence, QStandardItem, QStandardItemModel, QTextCursor, QTextDocument
 from PySide6.QtWidgets import (
     QApplication,
     QDialog,
@@ -18,9 +22,10 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QListView,
     QListWidget,
-    QListWidgetItem,
     QMessageBox,
+    QPlainTextDocumentLayout,
     QPlainTextEdit,
     QPushButton,
     QSpinBox,
@@ -32,52 +37,140 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from shared.latex.builder import build_pdf, detect_main_tex
-from shared.latex.diff import build_diff_pdf  # ⬅️ new
+from shared.jsonio import dumps_json, read_json
+from shared.latex.builder import build_pdf, detect_main_tex, find_built_pdf, tectonic_command
+from shared.latex.diff import build_diff_pdf, read_text_guess
+from shared.osutil import copy_files, iter_files, open_with_default_app
+from shared.ui.tasks import run_in_pool
 
 
 # ------------------------- JSON helpers -------------------------
+# comments.json path -> ((mtime_ns, size), parsed); callers get copies since the workspace edits in place
+_COMMENTS_CACHE: dict[Path, tuple[tuple[int, int], dict]] = {}
+
 def load_comments_json(reviews_dir: Path) -> dict:
     f = reviews_dir / "comments.json"
-    if f.exists():
+    try:
+        st = f.stat()
+    except OSError:
+        return {"general": "", "items": []}
+    key = (st.st_mtime_ns, st.st_size)
+    hit = _COMMENTS_CACHE.get(f)
+    if hit and hit[0] == key:
+        data = hit[1]
+    else:
         try:
-            data = json.loads(f.read_text(encoding="utf-8"))
-            if isinstance(data, dict):
-                data.setdefault("general", "")
-                data.setdefault("items", [])
-                return data
+            data = read_json(f)
         except Exception:
-            pass
-    return {"general": "", "items": []}
+            return {"general": "", "items": []}
+        if not isinstance(data, dict):
+            return {"general": "", "items": []}
+        data.setdefault("general", "")
+        data.setdefault("items", [])
+        _COMMENTS_CACHE[f] = (key, data)
+    items = data["items"]
+    return {**data, "items": [dict(it) if isinstance(it, dict) else it for it in items] if isinstance(items, list) else items}
 
 def save_comments_json(reviews_dir: Path, data: dict) -> None:
-    (reviews_dir / "comments.json").write_text(
-        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    # temp file + os.replace: readers (student app, sync clients) never see a half-written file
+    f = reviews_dir / "comments.json"
+    tmp = f.with_name(f.name + ".tmp")
+    with open(tmp, "wb", buffering=256 * 1024) as fh:
+        fh.write(dumps_json(data))
+    os.replace(tmp, f)
 
 # ---------------------------- utils ----------------------------
-def open_with_default_app(path: Path) -> None:
-    if sys.platform.startswith("win"):
-        import os
-        os.startfile(str(path))  # type: ignore[attr-defined]
-    elif sys.platform == "darwin":
-        subprocess.run(["open", str(path)], check=False)
-    else:
-        subprocess.run(["xdg-open", str(path)], check=False)
+# worktree -> ({dir: mtime_ns} for every folder walked, [(path, relpath)] with .tex files first)
+_FILE_LIST_CACHE: dict[Path, tuple[dict[str, int], list[tuple[str, str]]]] = {}
 
-def read_text_guess(path: Path) -> str:
-    for enc in ("utf-8", "latin-1"):
-        try:
-            return path.read_text(encoding=enc)
-        except Exception:
-            pass
-    return ""
+def _dirs_unchanged(snapshot: dict[str, int]) -> bool:
+    # adding/removing/renaming a file bumps its folder's mtime, so one stat per folder (not per file) suffices
+    try:
+        return all(os.stat(d).st_mtime_ns == m for d, m in snapshot.items())
+    except OSError:
+        return False
+
+def _list_worktree(root: Path) -> list[tuple[str, str]]:
+    """Files under `root` as (path, "/"-separated relpath).
+
+    The walk is reused while no folder in the tree has changed (e.g. reopening a review).
+    """
+    hit = _FILE_LIST_CACHE.get(root)
+    if hit and _dirs_unchanged(hit[0]):
+        return hit[1]
+    snapshot: dict[str, int] = {}  # filled by the walk, each folder stat'ed right before it is listed
+    tex: list[tuple[str, str]] = []; other: list[tuple[str, str]] = []
+    for path, rel in iter_files(root, dir_mtimes=snapshot):  # partitioned during the single scandir walk
+        if os.sep != "/": rel = rel.replace(os.sep, "/")  # POSIX rels: shown as-is and matched without replace()
+        (tex if rel.lower().endswith(".tex") else other).append((path, rel))
+    files = tex + other
+    if snapshot: _FILE_LIST_CACHE[root] = (snapshot, files)
+    return files
+
+# worktree -> (signature, diff PDF) of the last successful diff build
+_DIFF_CACHE: dict[Path, tuple[bytes, Path]] = {}
+
+def _worktree_signature(root: Path, main_rel: Optional[Path]) -> bytes:
+    """BLAKE2 over (relpath, size, mtime_ns) of every worktree file plus the main .tex used for the diff."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update((main_rel.as_posix() if main_rel else "").encode() + b"\0")
+    for path, rel in sorted(_list_worktree(root), key=lambda f: f[1]):
+        try: st = os.stat(path)
+        except OSError: continue
+        h.update(rel.encode() + b"\0"); h.update(st.st_size.to_bytes(8, "little")); h.update(st.st_mtime_ns.to_bytes(8, "little"))
+    return h.digest()
+
+def _cached_diff(root: Path, sig: bytes) -> Optional[Path]:
+    # diff PDF still matching the worktree, if any: rebuilding it would produce the same file
+    hit = _DIFF_CACHE.get(root)
+    return hit[1] if hit and hit[0] == sig and hit[1].exists() else None
 
 def write_text_utf8(path: Path, text: str) -> None:
+    # temp + os.replace: a crash or full disk mid-save never leaves a truncated source file
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(text, encoding="utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+def _build_compiled_and_diff(root: Path, main_rel: Optional[Path], compiled_pdf: Path,
+                             payload_dir: Path, worktree_dir: Path, reviews_dir: Path,
+                             diff_pdf: Optional[Path] = None) -> tuple:
+    """((ok, log) for compiled.pdf, (ok, log, pdf) for the diff); the two Tectonic runs overlap.
+
+    An up-to-date `diff_pdf` is reused instead of rebuilding the diff.
+    """
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f1 = ex.submit(build_pdf, root, main_rel, compiled_pdf) if main_rel else None
+        f2 = ex.submit(build_diff_pdf, payload_dir, worktree_dir, reviews_dir, main_rel) if diff_pdf is None else None
+        ok1, log1, _ = f1.result() if f1 else (False, "(no main .tex)", None)
+        diff = f2.result() if f2 else (True, f"Diff unchanged since last build: {diff_pdf.name}", diff_pdf)
+    return (ok1, log1), diff
 
 # --------------------------- dialog ----------------------------
+# installed once on the QApplication and scoped to the dialog's object name, so opening another
+# workspace does not re-parse it
+_LATEX_QSS = """
+    QDialog#LatexWorkspace QListView { font-size: 13px; }
+    QDialog#LatexWorkspace QPlainTextEdit { font-family: Menlo, Consolas, monospace; }
+    QDialog#LatexWorkspace QPushButton { padding: 6px 10px; }
+    QDialog#LatexWorkspace QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 4px; }
+"""
+
+def _install_qss() -> None:
+    app = QApplication.instance()
+    if app is not None and _LATEX_QSS not in app.styleSheet():
+        app.setStyleSheet(app.styleSheet() + _LATEX_QSS)
+
+_MONO_FONT: Optional[QFont] = None
+
+def _mono_font() -> QFont:
+    """Editor font, resolved once per process (needs a QApplication, hence not at import)."""
+    global _MONO_FONT
+    if _MONO_FONT is None:
+        _MONO_FONT = QFont("Menlo" if sys.platform == "darwin" else "Consolas")
+        _MONO_FONT.setStyleHint(QFont.Monospace); _MONO_FONT.setPointSize(12)
+    return _MONO_FONT
+
 class LatexWorkspace(QDialog):
     """
     Tối giản toolbar:
@@ -97,7 +190,18 @@ class LatexWorkspace(QDialog):
         self.compiled_pdf = reviews_dir / "compiled.pdf"
         self._last_built_pdf: Optional[Path] = None
         self.current_file: Optional[Path] = None
+        self._current_rel: Optional[str] = None  # current_file relative to the worktree, "/"-separated
+        self._file_paths: list[Path] = []  # absolute path per file-model row
         self._dirty = False
+        self._filtering = False  # selection changes caused by the filter hiding/showing rows are ignored
+        # recently opened files: path -> [mtime_ns, document, cursor pos, scroll value]
+        self._docs: OrderedDict[Path, list] = OrderedDict()
+        # root -> (folder snapshot of its listing, .tex sizes, detected main)
+        self._main_tex_cache: dict[Path, tuple[dict, list[int], Optional[Path]]] = {}
+        self._build_proc: Optional[QProcess] = None
+        self._bg_job: Optional[str] = None  # "diff" | "save" while a build runs on the thread pool
+        self._build_cancelled = False
+        self._comments: dict = {"general": "", "items": []}  # replaced by comments.json once _load_comments runs
 
         self._ensure_worktree()
 
@@ -116,8 +220,9 @@ class LatexWorkspace(QDialog):
 
         act(QStyle.SP_DialogSaveButton, "Save all and Close", self.save_all_and_close, QKeySequence("Ctrl+S"))
         tb.addSeparator()
-        act(QStyle.SP_ArrowRight, "Build PDF", self.build_pdf_clicked, QKeySequence("Ctrl+B"))
-        act(QStyle.SP_BrowserReload, "Preview diff PDF", self.preview_diff_pdf)
+        self._act_build = act(QStyle.SP_ArrowRight, "Build PDF", self.build_pdf_clicked, QKeySequence("Ctrl+B"))
+        self._act_cancel = act(QStyle.SP_BrowserStop, "Cancel build", self._cancel_build); self._act_cancel.setEnabled(False)
+        self._act_diff = act(QStyle.SP_BrowserReload, "Preview diff PDF", self.preview_diff_pdf)
 
         # Shortcut “Add comment from selection” (không hiện trên toolbar)
         self._act_quick_comment = QAction("Add comment from selection", self)
@@ -135,19 +240,28 @@ class LatexWorkspace(QDialog):
         left_layout = QVBoxLayout(left_box)
         self.ed_filter = QLineEdit(self)
         self.ed_filter.setPlaceholderText("Filter files (e.g. .tex, .bib, figures)")
-        self.ed_filter.textChanged.connect(self._apply_filter)
+        self.ed_filter.textChanged.connect(lambda _=None: self._filter_timer.start())
         left_layout.addWidget(self.ed_filter)
-        self.list_files = QListWidget(self)
-        self.list_files.itemSelectionChanged.connect(self._on_file_selected)
+        self._filter_timer = QTimer(self); self._filter_timer.setSingleShot(True); self._filter_timer.setInterval(100)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        # files: model -> case-insensitive proxy (filtering is one in-model pass, not a setHidden per row)
+        self._file_model = QStandardItemModel(self)
+        self._file_proxy = QSortFilterProxyModel(self); self._file_proxy.setSourceModel(self._file_model)
+        self._file_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.list_files = QListView(self); self.list_files.setModel(self._file_proxy)
+        self.list_files.setUniformItemSizes(True); self.list_files.setEditTriggers(QListView.NoEditTriggers)
+        self.list_files.selectionModel().selectionChanged.connect(lambda *_: self._on_file_selected())
         left_layout.addWidget(self.list_files, stretch=1)
 
         # Centre: editor + status + build log
         centre_box = QGroupBox("Editor")
         centre_layout = QVBoxLayout(centre_box)
         self.editor = QPlainTextEdit(self)
-        mono = QFont("Menlo" if sys.platform == "darwin" else "Consolas"); mono.setStyleHint(QFont.Monospace); mono.setPointSize(12)
-        self.editor.setFont(mono)
+        self.editor.setFont(_mono_font())
+        self._blank_doc = self._new_doc()  # shown while no file is selected; one per dialog, reused
         self.editor.textChanged.connect(self._on_editor_changed)
+        self._status_timer = QTimer(self); self._status_timer.setSingleShot(True); self._status_timer.setInterval(150)
+        self._status_timer.timeout.connect(self._update_editor_status)
         self.editor.cursorPositionChanged.connect(self._sync_comment_line_from_cursor)
         try:
             self.editor.selectionChanged.connect(self._sync_comment_line_from_cursor)  # type: ignore[attr-defined]
@@ -183,63 +297,67 @@ class LatexWorkspace(QDialog):
         split_main.setSizes([260, 680, 360])
         outer.addWidget(split_main, stretch=1)
 
-        self.setStyleSheet("""
-            QListWidget { font-size: 13px; }
-            QPlainTextEdit { font-family: Menlo, Consolas, monospace; }
-            QPushButton { padding: 6px 10px; }
-            QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 4px; }
-        """)
+        self.setObjectName("LatexWorkspace"); _install_qss()
 
         self._refresh_file_list()
-        self._load_comments()
+        # the comments panel is visible from the start; only its comments.json read waits for the first paint
+        QTimer.singleShot(0, self._load_comments)
         self._sync_comment_line_from_cursor()
 
     # --------- worktree ----------
     def _ensure_worktree(self) -> None:
-        if self.worktree_dir.exists():
+        if self.worktree_dir.exists() or not self.payload_dir.is_dir():
             return
-        for p in self.payload_dir.rglob("*"):
-            if p.is_dir(): continue
-            rel = p.relative_to(self.payload_dir)
-            dst = self.worktree_dir / rel
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(p, dst)
+        # one scandir walk, each parent dir created once, then overlapped OS-level copies.
+        # Real copies, not hardlinks: the worktree is edited (also by external editors) and must never
+        # share inodes with the student's submitted payload.
+        jobs = [(src, self.worktree_dir / rel) for src, rel in iter_files(self.payload_dir)]
+        for d in sorted({dst.parent for _, dst in jobs} | {self.worktree_dir}):
+            d.mkdir(parents=True, exist_ok=True)
+        copy_files(jobs)
 
     # --------- files & filter ----------
     def _refresh_file_list(self) -> None:
-        self.list_files.clear()
-        files = [p for p in self.worktree_dir.rglob("*") if p.is_file()]
-        files_tex = [p for p in files if p.suffix.lower() == ".tex"]
-        files_oth = [p for p in files if p.suffix.lower() != ".tex"]
-
-        def add_item(p: Path):
-            it = QListWidgetItem(str(p.relative_to(self.worktree_dir)), self.list_files)
-            it.setData(Qt.UserRole, str(p))
-        for p in files_tex + files_oth:
-            add_item(p)
+        files = _list_worktree(self.worktree_dir)
+        self._file_paths = [Path(path) for path, _ in files]  # by source row: no per-item role data
+        self._file_model.clear()
+        if files: self._file_model.invisibleRootItem().appendRows([QStandardItem(rel) for _, rel in files])
         self._apply_filter()
 
-        main_rel = detect_main_tex(self.worktree_dir)
+        main_rel = self._detect_main_tex(self.worktree_dir)
         if main_rel:
-            target = str(main_rel).replace("\\", "/")
-            for i in range(self.list_files.count()):
-                it = self.list_files.item(i)
-                if it.text().replace("\\", "/") == target:
-                    self.list_files.setCurrentItem(it)
-                    break
+            target = main_rel.as_posix()
+            row = next((i for i, (_, rel) in enumerate(files) if rel == target), -1)  # plain str ==, no copies
+            if row >= 0:
+                idx = self._file_proxy.mapFromSource(self._file_model.index(row, 0))
+                if idx.isValid(): self.list_files.setCurrentIndex(idx)
 
     def _apply_filter(self) -> None:
-        q = (self.ed_filter.text() or "").strip().lower()
-        for i in range(self.list_files.count()):
-            it = self.list_files.item(i)
-            it.setHidden(q not in it.text().lower())
+        # filtering never switches the open file: the proxy dropping the selected row makes Qt select
+        # another one, so selection changes are ignored here and the open file's row is re-selected
+        self._filtering = True
+        try:
+            self._file_proxy.setFilterFixedString((self.ed_filter.text() or "").strip())
+            idx = self._proxy_index(self.current_file)
+            if idx.isValid(): self.list_files.setCurrentIndex(idx)
+            else: self.list_files.selectionModel().clear()  # open file filtered out: keep it in the editor
+        finally:
+            self._filtering = False
+
+    def _proxy_index(self, path: Optional[Path]):
+        try: row = self._file_paths.index(path) if path else -1
+        except ValueError: row = -1
+        return self._file_proxy.mapFromSource(self._file_model.index(row, 0))
 
     # --------- editor ----------
     def _on_file_selected(self) -> None:
-        items = self.list_files.selectedItems()
+        if self._filtering: return
+        items = self.list_files.selectionModel().selectedIndexes()
         if not items:
-            self.current_file = None
-            self.editor.clear()
+            self._stash_view()
+            self.current_file = self._current_rel = None
+            self._blank_doc.clear()  # anything typed into it last time
+            self.editor.setDocument(self._blank_doc)  # not editor.clear(): that would wipe a cached document
             self.editor_status.setText("No file opened")
             self.spin_start.setValue(1); self.spin_end.setValue(1)
             return
@@ -248,21 +366,58 @@ class LatexWorkspace(QDialog):
                                     QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
                 self.save_current_file()
 
-        path = Path(items[0].data(Qt.UserRole))
+        self._stash_view()
+        path = self._file_paths[self._file_proxy.mapToSource(items[0]).row()]
         self.current_file = path
-        self.editor.setPlainText(read_text_guess(path))
+        self._current_rel = items[0].data()  # the row label is the "/"-separated relative path
+        entry = self._doc_for(path)
+        self.editor.setUpdatesEnabled(False)
+        try:
+            self.editor.setDocument(entry[1])  # swap in a laid-out document instead of re-parsing text
+            c = self.editor.textCursor(); c.setPosition(min(entry[2], entry[1].characterCount() - 1))
+            self.editor.setTextCursor(c); self.editor.verticalScrollBar().setValue(entry[3])
+        finally:
+            self.editor.setUpdatesEnabled(True)
         self._dirty = False
         self._update_editor_status()
         self._sync_comment_line_from_cursor()
 
+    _DOC_CACHE_MAX = 8
+
+    def _new_doc(self, text: str = "") -> QTextDocument:
+        doc = QTextDocument(self); doc.setDocumentLayout(QPlainTextDocumentLayout(doc))
+        doc.setDefaultFont(self.editor.font()); doc.setPlainText(text); doc.setModified(False)
+        return doc
+
+    def _doc_for(self, path: Path) -> list:
+        """Cached document for `path`; reloaded if the file changed on disk or holds discarded edits."""
+        try: mtime = path.stat().st_mtime_ns
+        except OSError: mtime = -1
+        entry = self._docs.get(path)
+        if entry and entry[0] == mtime and not entry[1].isModified():
+            self._docs.move_to_end(path)
+            return entry
+        if entry:
+            entry[1].deleteLater()
+        entry = self._docs[path] = [mtime, self._new_doc(read_text_guess(path)), 0, 0]
+        self._docs.move_to_end(path)
+        while len(self._docs) > self._DOC_CACHE_MAX:
+            _, old = self._docs.popitem(last=False); old[1].deleteLater()
+        return entry
+
+    def _stash_view(self) -> None:
+        entry = self._docs.get(self.current_file) if self.current_file else None
+        if entry and entry[1] is self.editor.document():
+            entry[2] = self.editor.textCursor().position(); entry[3] = self.editor.verticalScrollBar().value()
+
     def _on_editor_changed(self) -> None:
         if self.current_file is None: return
-        self._dirty = True; self._update_editor_status()
+        self._dirty = True; self._status_timer.start()  # label refresh coalesced while typing
 
     def _update_editor_status(self) -> None:
         c = self.editor.textCursor()
         line, col = c.blockNumber() + 1, c.columnNumber() + 1
-        name = self.current_file.relative_to(self.worktree_dir) if self.current_file else "(none)"
+        name = self._current_rel_path() or "(none)"
         self.editor_status.setText(f"{name} — Ln {line}, Col {col}{' • modified' if self._dirty else ''}")
 
     def save_current_file(self) -> None:
@@ -270,23 +425,94 @@ class LatexWorkspace(QDialog):
         try:
             write_text_utf8(self.current_file, self.editor.toPlainText())
             self._dirty = False; self._update_editor_status()
+            entry = self._docs.get(self.current_file)
+            if entry and entry[1] is self.editor.document():
+                entry[0] = self.current_file.stat().st_mtime_ns; entry[1].setModified(False)
         except Exception as e:
             QMessageBox.critical(self, "Save failed", str(e))
 
     # --------- build / open ----------
+    def _detect_main_tex(self, root: Path) -> Optional[Path]:
+        """detect_main_tex, reused while no folder under `root` changed and every .tex keeps its size.
+
+        The folder snapshot is _list_worktree's (a .tex added/removed/renamed at any depth gives a new
+        one); sizes matter because the fallback picks the largest .tex.
+        """
+        files = _list_worktree(root)
+        snapshot = _FILE_LIST_CACHE.get(root, (None,))[0]
+        if snapshot is None: return detect_main_tex(root)
+        sizes = []
+        for path, rel in files:
+            if not rel.lower().endswith(".tex"): break  # .tex files are listed first
+            try: sizes.append(os.stat(path).st_size)
+            except OSError: sizes.append(-1)
+        hit = self._main_tex_cache.get(root)
+        if hit and hit[0] is snapshot and hit[1] == sizes:
+            return hit[2]
+        main_rel = detect_main_tex(root)
+        self._main_tex_cache[root] = (snapshot, sizes, main_rel)
+        return main_rel
+
+    def _build_target(self) -> tuple[Path, Optional[Path]]:
+        """(root, main .tex relative to root): the worktree's if it has one, else the original payload's."""
+        main_rel = self._detect_main_tex(self.worktree_dir)
+        if main_rel:
+            return self.worktree_dir, main_rel
+        return self.payload_dir, self._detect_main_tex(self.payload_dir)
+
     def build_pdf_clicked(self) -> None:
+        if self._build_proc is not None: return
         if self._dirty: self.save_current_file()
-        main_rel = detect_main_tex(self.worktree_dir) or detect_main_tex(self.payload_dir)
-        root = self.worktree_dir if detect_main_tex(self.worktree_dir) else self.payload_dir
+        root, main_rel = self._build_target()
         if main_rel is None:
             QMessageBox.warning(self, "No .tex", "Cannot find a main .tex file to build.")
             return
-        self.log_box.setPlainText("Building…")
-        ok, log, produced = build_pdf(root, main_rel, self.compiled_pdf)
-        self.log_box.setPlainText(log or "(no log)")
-        if ok:
+        root = root.resolve()
+        cmd, env = tectonic_command(root, main_rel, self.compiled_pdf)
+        # QProcess: the log streams into log_box as Tectonic writes it and the run can be cancelled
+        p = QProcess(self); p.setProgram(cmd[0]); p.setArguments(cmd[1:]); p.setWorkingDirectory(str(root))
+        penv = QProcessEnvironment()
+        for k, v in env.items(): penv.insert(k, v)
+        p.setProcessEnvironment(penv); p.setProcessChannelMode(QProcess.MergedChannels)
+        p.readyReadStandardOutput.connect(self._on_build_output)
+        p.finished.connect(self._on_build_finished)
+        p.errorOccurred.connect(self._on_build_error)
+        self._build_proc = p; self._build_cancelled = False; self._build_main = main_rel
+        self._build_decoder = codecs.getincrementaldecoder("utf-8")("replace")  # chunks may split a character
+        self.log_box.setPlainText(f"$ {' '.join(shlex.quote(x) for x in cmd)}\n")
+        self._act_build.setEnabled(False); self._act_cancel.setEnabled(True)
+        p.start()
+
+    def _on_build_output(self) -> None:
+        if self._build_proc is None: return
+        text = self._build_decoder.decode(bytes(self._build_proc.readAllStandardOutput()))
+        if text:
+            self.log_box.moveCursor(QTextCursor.End); self.log_box.insertPlainText(text)
+
+    def _cancel_build(self) -> None:
+        if self._build_proc is not None:
+            self._build_cancelled = True; self._build_proc.kill()
+
+    def _end_build(self) -> None:
+        self._build_proc.deleteLater(); self._build_proc = None
+        self._act_build.setEnabled(self._bg_job is None); self._act_cancel.setEnabled(False)
+
+    def _on_build_error(self, err) -> None:
+        if err != QProcess.FailedToStart: return  # other errors are followed by finished()
+        self._end_build()
+        self.log_box.appendPlainText("Tectonic executable not found. Please bundle vendor/tectonic correctly.")
+        QMessageBox.warning(self, "Build", "Build failed. See log for details.")
+
+    def _on_build_finished(self, code: int, status) -> None:
+        self._on_build_output()
+        cancelled = self._build_cancelled
+        self._end_build()
+        if cancelled:
+            self.log_box.appendPlainText("Build cancelled."); return
+        produced = find_built_pdf(self.compiled_pdf, self._build_main)
+        if status == QProcess.NormalExit and code == 0 and produced is not None:
             try:
-                if produced and produced.exists() and produced.resolve() != self.compiled_pdf.resolve():
+                if produced.resolve() != self.compiled_pdf.resolve():
                     shutil.copy2(produced, self.compiled_pdf)
                 self._last_built_pdf = self.compiled_pdf if self.compiled_pdf.exists() else produced
             except Exception:
@@ -295,10 +521,32 @@ class LatexWorkspace(QDialog):
         else:
             QMessageBox.warning(self, "Build", "Build failed. See log for details.")
 
+    def _set_bg_job(self, job: Optional[str]) -> None:
+        self._bg_job = job
+        self._act_diff.setEnabled(job is None); self._act_build.setEnabled(job is None and self._build_proc is None)
+
     def preview_diff_pdf(self) -> None:
+        if self._bg_job is not None: return
         if self._dirty: self.save_current_file()
         self.log_box.setPlainText("Building diff…")
-        ok, log, produced = build_diff_pdf(self.payload_dir, self.worktree_dir, self.reviews_dir)
+        _, main_rel = self._build_target()
+        sig = _worktree_signature(self.worktree_dir, main_rel)  # taken before the build: later edits won't match it
+        cached = _cached_diff(self.worktree_dir, sig)
+        if cached:
+            self.log_box.setPlainText(f"No changes since the last diff build; reopening {cached.name}.")
+            open_with_default_app(cached); return
+        self._set_bg_job("diff")
+        run_in_pool(build_diff_pdf, self.payload_dir, self.worktree_dir, self.reviews_dir, main_rel,
+                    on_done=lambda res: self._diff_done(res, sig),
+                    on_error=lambda msg: self._diff_done((False, msg, None), sig))
+
+    def _record_diff(self, sig: bytes, ok: bool, produced: Optional[Path]) -> None:
+        if ok and produced: _DIFF_CACHE[self.worktree_dir] = (sig, produced)
+        else: _DIFF_CACHE.pop(self.worktree_dir, None)
+
+    def _diff_done(self, res, sig: bytes) -> None:
+        ok, log, produced = res
+        self._set_bg_job(None); self._record_diff(sig, ok, produced)
         self.log_box.setPlainText(log or "(no log)")
         if ok and produced and produced.exists():
             open_with_default_app(produced)
@@ -311,15 +559,23 @@ class LatexWorkspace(QDialog):
         self.ed_general.setPlainText(self._comments.get("general", ""))
         self._refresh_comments_view()
 
+    @staticmethod
+    def _comment_label(it: dict) -> str:
+        f = it.get("file", "")
+        ls = it.get("line_start", it.get("line", ""))
+        le = it.get("line_end", ls)
+        t = it.get("text", "")
+        loc = f"{f}:{ls}" if ls == le else f"{f} [{ls}-{le}]"
+        return f"{loc} — {t}"
+
     def _refresh_comments_view(self) -> None:
+        # full rebuild: initial load only; add/delete touch a single row
         self.list_comments.clear()
-        for it in self._comments.get("items", []):
-            f = it.get("file", "")
-            ls = it.get("line_start", it.get("line", ""))
-            le = it.get("line_end", ls)
-            t = it.get("text", "")
-            loc = f"{f}:{ls}" if ls == le else f"{f} [{ls}-{le}]"
-            QListWidgetItem(f"{loc} — {t}", self.list_comments)
+        self.list_comments.addItems([self._comment_label(it) for it in self._comments.get("items", [])])
+
+    def _append_comment(self, item: dict) -> None:
+        self._comments.setdefault("items", []).append(item)
+        self.list_comments.addItem(self._comment_label(item))
 
     def add_comment_from_fields(self) -> None:
         file_rel = self._current_rel_path()
@@ -329,51 +585,53 @@ class LatexWorkspace(QDialog):
         txt = self.ed_item_text.text().strip()
         if not txt: return
         s = int(self.spin_start.value()); e = max(s, int(self.spin_end.value()))
-        self._comments.setdefault("items", []).append({"file": file_rel, "line_start": s, "line_end": e, "text": txt})
-        self.ed_item_text.clear(); self._refresh_comments_view()
+        self._append_comment({"file": file_rel, "line_start": s, "line_end": e, "text": txt})
+        self.ed_item_text.clear()
 
     def add_comment_from_selection(self) -> None:
         file_rel = self._current_rel_path()
         if not file_rel:
             QMessageBox.information(self, "No file", "Open a file to attach the comment to.")
             return
-        cursor = self.editor.textCursor()
-        if not cursor.hasSelection():
-            s = e = cursor.blockNumber() + 1
-        else:
-            s = self._pos_to_line(min(cursor.selectionStart(), cursor.selectionEnd()))
-            e = self._pos_to_line(max(cursor.selectionStart(), cursor.selectionEnd()))
+        s, e = self._selection_lines(self.editor.textCursor())
         self.spin_start.setValue(s); self.spin_end.setValue(e)
         txt = self.ed_item_text.text().strip() or "Add new line"
-        self._comments.setdefault("items", []).append({"file": file_rel, "line_start": int(s), "line_end": int(e), "text": txt})
-        self.ed_item_text.clear(); self._refresh_comments_view()
+        self._append_comment({"file": file_rel, "line_start": int(s), "line_end": int(e), "text": txt})
+        self.ed_item_text.clear()
 
     def delete_selected_comment(self) -> None:
         row = self.list_comments.currentRow()
         if row < 0: return
         try: del self._comments["items"][row]
-        except Exception: pass
-        self._refresh_comments_view()
+        except Exception: self._refresh_comments_view(); return
+        self.list_comments.takeItem(row)
 
     def _current_rel_path(self) -> Optional[str]:
-        if not self.current_file: return None
-        try: rel = self.current_file.relative_to(self.worktree_dir)
-        except Exception: return None
-        return str(rel).replace("\\", "/")
+        return self._current_rel if self.current_file else None
 
     def _pos_to_line(self, pos: int) -> int:
         doc = self.editor.document(); block = doc.findBlock(pos)
         return block.blockNumber() + 1
 
+    def _selection_lines(self, c) -> tuple[int, int]:
+        """1-based (start, end) lines of the selection, or the cursor line twice."""
+        if not c.hasSelection():
+            n = c.blockNumber() + 1
+            return n, n
+        # selectionStart/End are already ordered; the cursor's own block answers one end without a lookup
+        start, end = c.selectionStart(), c.selectionEnd()
+        here = c.blockNumber() + 1
+        if c.position() == end:
+            return self._pos_to_line(start), here
+        return here, self._pos_to_line(end)
+
     def _sync_comment_line_from_cursor(self) -> None:
         try:
             c = self.editor.textCursor()
             if not c: return
-            if c.hasSelection():
-                s_line = self._pos_to_line(min(c.selectionStart(), c.selectionEnd()))
-                e_line = self._pos_to_line(max(c.selectionStart(), c.selectionEnd()))
-            else:
-                s_line = e_line = c.blockNumber() + 1
+            s_line, e_line = self._selection_lines(c)
+            if (s_line, e_line) == (self.spin_start.value(), self.spin_end.value()):
+                return  # cursorPositionChanged + selectionChanged both fire per move
             self.spin_start.blockSignals(True); self.spin_end.blockSignals(True)
             self.spin_start.setValue(max(1, int(s_line))); self.spin_end.setValue(max(1, int(e_line)))
             self.spin_start.blockSignals(False); self.spin_end.blockSignals(False)
@@ -382,6 +640,8 @@ class LatexWorkspace(QDialog):
 
     # --------- Save-all & lifecycle ----------
     def save_all_and_close(self) -> None:
+        if self._build_proc is not None or self._bg_job is not None:  # a build is still writing into reviews/
+            QMessageBox.information(self, "Build", "A build is still running. Try again when it finishes."); return
         # 1) save current file (if modified)
         if self._dirty: self.save_current_file()
         # 2) save comments
@@ -392,16 +652,17 @@ class LatexWorkspace(QDialog):
             QMessageBox.critical(self, "Save comments failed", str(e))
             # vẫn tiếp tục các bước sau để không mất tiến độ
 
-        # 3) build compiled.pdf
-        main_rel = detect_main_tex(self.worktree_dir) or detect_main_tex(self.payload_dir)
-        root = self.worktree_dir if detect_main_tex(self.worktree_dir) else self.payload_dir
-        ok1, log1, _ = (False, "(no main .tex)", None)
-        if main_rel:
-            ok1, log1, _ = build_pdf(root, main_rel, self.compiled_pdf)
-
-        # 4) build diff PDF
-        ok2, log2, produced = build_diff_pdf(self.payload_dir, self.worktree_dir, self.reviews_dir)
-
+        # 3) + 4) compiled.pdf and the diff PDF, off the GUI thread; the dialog is locked until they finish
+        root, main_rel = self._build_target()
+        sig = _worktree_signature(self.worktree_dir, main_rel)
+        self.log_box.setPlainText("Building…"); self._set_bg_job("save"); self.setEnabled(False)
+        run_in_pool(_build_compiled_and_diff, root, main_rel, self.compiled_pdf,
+                    self.payload_dir, self.worktree_dir, self.reviews_dir, _cached_diff(self.worktree_dir, sig),
+                    on_done=lambda res: self._save_all_done(res, sig), on_error=self._save_all_failed)
+
+    def _save_all_done(self, res, sig: bytes) -> None:
+        (ok1, log1), (ok2, log2, diff_pdf) = res
+        self._set_bg_job(None); self.setEnabled(True); self._record_diff(sig, ok2, diff_pdf)
         # 5) report + close
         msg = []
         msg.append("Saved file(s) and comments.")
@@ -411,7 +672,23 @@ class LatexWorkspace(QDialog):
         QMessageBox.information(self, "Saved", "\n".join(msg))
         self.accept()
 
+    def _save_all_failed(self, err: str) -> None:
+        self._set_bg_job(None); self.setEnabled(True)
+        self.log_box.setPlainText(err); QMessageBox.warning(self, "Build", "Files and comments were saved, but the build failed.")
+
+    def done(self, r: int) -> None:
+        # a pool build is writing into reviews/ (diff/ is rmtree'd + copied): the caller's return flow
+        # would rebuild the same folder, so the dialog stays open until it finishes (save-all then closes it)
+        if self._bg_job is not None:
+            self.log_box.appendPlainText("Still building — the workspace can be closed once it finishes."); return
+        if self._build_proc is not None:  # accept/reject/close: don't leave Tectonic running behind the dialog
+            self._build_cancelled = True; self._build_proc.kill(); self._build_proc.waitForFinished(2000)
+        super().done(r)
+
     def closeEvent(self, ev):
+        if self._bg_job is not None:  # see done()
+            self.log_box.appendPlainText("Still building — the workspace can be closed once it finishes.")
+            ev.ignore(); return
         if self._dirty:
             ans = QMessageBox.question(self, "Unsaved changes", "Save current file before closing?",
                                        QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
@@ -65,8 +65,11 @@ class SupervisorWindow(QMainWindow):
         tb.setIconSize(QSize(18, 18))
         tb.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
         self.addToolBar(tb)
+        _icons: dict = {}
         def _act(icon, text, slot, checkable=False):
-            a = QAction(self.style().standardIcon(icon), text, self)
+            ic = _icons.get(icon)
+            if ic is None: ic = _icons[icon] = self.style().standardIcon(icon)
+            a = QAction(ic, text, self)
             a.setCheckable(checkable); a.triggered.connect(slot); tb.addAction(a); return a
         _act(QStyle.SP_DirOpenIcon, "Choose Students’ Root…", self.choose_root)
         _act(QStyle.SP_BrowserReload, "Scan", self.scan_root)
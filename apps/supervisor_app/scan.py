@@ -8,7 +8,8 @@ from typing import Iterable, List, Optional, Tuple
 
 from shared.detect import detect_manuscript_type
 from shared.due import is_overdue_iso, read_return_due
-from shared.events import get_submission_times
+from shared.events import get_all_submission_times
+from shared.jsonio import read_json
 from shared.models import ManuscriptType
 from shared.timeutil import iso_to_local_str
 
@@ -48,15 +49,23 @@ def last_review_edit_iso(manuscript_root: Path, submission_id: str) -> Optional[
     latest = max(mtimes)
     return datetime.fromtimestamp(latest, tz=timezone.utc).isoformat(timespec="minutes").replace("+00:00","Z")
 
-def _read_title_and_journal(manifest_path: Path, payload: Path, title_default: str) -> tuple[str, str]:
-    title = title_default
-    journal = ""
+def _read_manifest(manifest_path: Path) -> dict:
     try:
-        mf = json.loads(manifest_path.read_text(encoding="utf-8"))
-        title = mf.get("manuscript_title", title)
-        journal = (mf.get("journal") or "").strip()
+        mf = read_json(manifest_path)
+        return mf if isinstance(mf, dict) else {}
     except Exception:
-        pass
+        return {}
+
+def _manuscript_type(mf: dict, payload: Path) -> ManuscriptType:
+    """Type recorded in the manifest at submit time; walk the payload only for manifests without one."""
+    try:
+        return ManuscriptType(mf["manuscript_type"])
+    except (KeyError, ValueError, TypeError):
+        return detect_manuscript_type(payload)
+
+def _read_title_and_journal(mf: dict, payload: Path, title_default: str) -> tuple[str, str]:
+    title = mf.get("manuscript_title", title_default)
+    journal = (mf.get("journal") or "").strip()
     if not journal:
         try:
             py = json.loads((payload / "paper.yaml").read_text(encoding="utf-8"))
@@ -85,25 +94,22 @@ def scan_students_root(root: Path, *,
             if not subs_dir.exists():
                 continue
             title_default = manuscript_dir.name
+            times = get_all_submission_times(manuscript_dir / "events")
             for subdir in sorted(p for p in subs_dir.iterdir() if p.is_dir()):
                 manifest_path = subdir / "manifest.json"
                 if not manifest_path.exists():
                     continue
                 payload = subdir / "payload"
-                mtype = detect_manuscript_type(payload)
+                mf = _read_manifest(manifest_path)
+                mtype = _manuscript_type(mf, payload)
                 status = submission_status(manuscript_dir, subdir.name)
                 # times
-                events_dir = manuscript_dir / "events"
-                sub_iso, ret_iso = get_submission_times(events_dir, subdir.name)
+                sub_iso, ret_iso = times.get(subdir.name, (None, None))
                 if not sub_iso:
-                    try:
-                        mf = json.loads(manifest_path.read_text(encoding="utf-8"))
-                        sub_iso = mf.get("submitted_at")
-                    except Exception:
-                        pass
+                    sub_iso = mf.get("submitted_at")
                 last_iso = last_review_edit_iso(manuscript_dir, subdir.name)
                 # title/journal
-                title, journal = _read_title_and_journal(manifest_path, payload, title_default)
+                title, journal = _read_title_and_journal(mf, payload, title_default)
 
                 # filters
                 if q:
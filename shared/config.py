@@ -3,10 +3,12 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from appdirs import user_config_dir
 
+from shared.jsonio import read_json
+
 APP_NAME = "Paperforge"
 APP_AUTHOR = "Paperforge"
 CONFIG_DIR = Path(user_config_dir(APP_NAME, APP_AUTHOR))
@@ -33,7 +35,7 @@ def load_config() -> Dict[str, Any]:
         CONFIG_FILE.write_text(json.dumps(cfg, indent=2))
         return cfg
     try:
-        return json.loads(CONFIG_FILE.read_text())
+        return read_json(CONFIG_FILE)
     except Exception:
         # If corrupt, back up and reset
         backup = CONFIG_FILE.with_suffix(".bak")
@@ -43,6 +45,23 @@ def load_config() -> Dict[str, Any]:
         return cfg
 
 
+# (mtime_ns, size) of config.json -> parsed config, shared by the read-only getters below
+_snapshot: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+
+
+def _config_snapshot() -> Dict[str, Any]:
+    """Parsed config for lookups only (do not mutate); re-read when config.json changes on disk."""
+    global _snapshot
+    try:
+        st = CONFIG_FILE.stat()
+    except OSError:
+        return load_config()
+    key = (st.st_mtime_ns, st.st_size)
+    if _snapshot is None or _snapshot[0] != key:
+        _snapshot = (key, load_config())
+    return _snapshot[1]
+
+
 def save_config(cfg: Dict[str, Any]) -> None:
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     CONFIG_FILE.write_text(json.dumps(cfg, indent=2))
@@ -67,10 +86,9 @@ def remember_mapping(local_working_dir: Path, students_root: str, student_name:
 
 
 def get_mapping(local_working_dir: Path) -> Optional[Dict[str, str]]:
-    cfg = load_config()
-    return cfg["manuscripts"].get(str(local_working_dir.resolve()))
+    m = _config_snapshot()["manuscripts"].get(str(local_working_dir.resolve()))
+    return dict(m) if m else m
 
 
 def get_defaults() -> Dict[str, str]:
-    cfg = load_config()
-    return cfg.get("defaults", {"students_root": "", "student_name": ""})
+    return dict(_config_snapshot().get("defaults", {"students_root": "", "student_name": ""}))
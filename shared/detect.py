@@ -1,16 +1,35 @@
 # shared/manuscript/detect.py
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 from shared.models import ManuscriptType
 
 
+def _scan_kinds(root: Path) -> tuple[bool, bool]:
+    """Single scandir walk → (has_word, has_tex); stops as soon as both are seen."""
+    has_word = has_tex = False
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path); continue
+                ext = os.path.splitext(e.name)[1].lower()
+                if ext in (".docx", ".doc"): has_word = True
+                elif ext == ".tex": has_tex = True
+                else: continue
+                if has_word and has_tex:
+                    return True, True
+    return has_word, has_tex
+
 def detect_doc_kind(root: Path) -> str:
-    has_docx = any(p.is_file() and p.suffix.lower() == ".docx" for p in root.rglob("*"))
-    has_doc  = any(p.is_file() and p.suffix.lower() == ".doc"  for p in root.rglob("*"))
-    has_tex  = any(p.is_file() and p.suffix.lower() == ".tex"  for p in root.rglob("*"))
-    has_word = has_docx or has_doc
+    has_word, has_tex = _scan_kinds(root)
     if has_word and not has_tex: return "docx"
     if has_tex  and not has_word: return "latex"
     if has_word and has_tex:      return "docx"   # ưu tiên Word cho MVP
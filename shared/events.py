@@ -113,22 +113,32 @@ def read_events(events_dir: Path) -> List[Dict[str, Any]]:
     return sorted(out, key=_key)
 
 
-def get_submission_times(events_dir: Path, submission_id: str) -> Tuple[Optional[str], Optional[str]]:
+def get_all_submission_times(events_dir: Path) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
     """
-    Return (submitted_ts, returned_ts) in ISO UTC for a given submission_id.
-    If multiple, pick earliest 'submitted' and latest 'returned'.
+    Return {submission_id: (submitted_ts, returned_ts)} from a single pass over the events.
+    Same picking rule as get_submission_times (earliest 'submitted', latest 'returned').
     """
-    submitted: Optional[str] = None
-    returned: Optional[str] = None
+    out: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
     for ev in read_events(events_dir):
-        if ev.get("submission_id") != submission_id:
-            continue
+        sid = ev.get("submission_id")
         et = ev.get("type")
+        if not sid or et not in ("submitted", "returned"):
+            continue
         ts = ev.get("ts")
+        submitted, returned = out.get(sid, (None, None))
         if et == "submitted":
             if submitted is None or (ts and ts < submitted):
                 submitted = ts
-        elif et == "returned":
-            if returned is None or (ts and ts > returned):
-                returned = ts
-    return submitted, returned
+        elif returned is None or (ts and ts > returned):
+            returned = ts
+        out[sid] = (submitted, returned)
+    return out
+
+
+def get_submission_times(events_dir: Path, submission_id: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Return (submitted_ts, returned_ts) in ISO UTC for a given submission_id.
+    If multiple, pick earliest 'submitted' and latest 'returned'.
+    When looking up many submissions, call get_all_submission_times once instead.
+    """
+    return get_all_submission_times(events_dir).get(submission_id, (None, None))
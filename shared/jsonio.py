@@ -0,0 +1,30 @@
+# shared/jsonio.py
+"""JSON file helpers: orjson when it is installed, the stdlib json module otherwise."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+try:  # optional speed-up
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def read_json(path: Path) -> Any:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())  # orjson decodes the UTF-8 bytes itself
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def dumps_json(obj: Any) -> bytes:
+    """`obj` as 2-space indented UTF-8 JSON bytes (non-ASCII kept as-is)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def write_json(path: Path, obj: Any) -> None:
+    """Write `obj` as 2-space indented UTF-8 JSON (non-ASCII kept as-is)."""
+    path.write_bytes(dumps_json(obj))
@@ -49,9 +49,10 @@ def _tectonic_env() -> dict:
     return env
 
 
-def _tectonic_cmd(workdir: Path, main_rel: Path, out_pdf: Path) -> Tuple[list[str], dict]:
+def tectonic_command(workdir: Path, main_rel: Path, out_pdf: Path) -> Tuple[list[str], dict]:
     """
     Lệnh tectonic compile chuẩn (ra PDF), trả về (cmd_list, env_dict).
+    Public so GUI callers can run it through QProcess and stream the log.
     """
     exe = get_tectonic_path()  # Path tới vendor/.../tectonic(.exe) hoặc 'tectonic' nếu có trên PATH
     outdir = out_pdf.parent
@@ -71,6 +72,22 @@ def _tectonic_cmd(workdir: Path, main_rel: Path, out_pdf: Path) -> Tuple[list[st
     return cmd, _tectonic_env()
 
 
+def find_built_pdf(out_pdf: Path, main_rel: Optional[Path] = None) -> Optional[Path]:
+    """PDF produced for `out_pdf`: Tectonic names it after the main .tex inside `out_pdf`'s folder.
+
+    Checking `<main stem>.pdf` first keeps two builds sharing that folder (compiled + diff)
+    from picking up each other's output; then `out_pdf` itself, then the newest PDF there.
+    """
+    if main_rel is not None:
+        named = out_pdf.parent / (Path(main_rel).stem + ".pdf")
+        if named.exists():
+            return named
+    if out_pdf.exists():
+        return out_pdf
+    pdfs = sorted(out_pdf.parent.glob("*.pdf"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return pdfs[0] if pdfs else None
+
+
 def _read_file_safely(p: Path) -> str:
     try:
         return p.read_text(encoding="utf-8", errors="replace")
@@ -95,7 +112,7 @@ def build_pdf(workdir: Path, main_rel: Path, out_pdf: Path) -> Tuple[bool, str,
     if not (workdir / main_rel).exists():
         return False, f"Main TeX not found: {(workdir / main_rel)}", None
 
-    cmd, env = _tectonic_cmd(workdir, main_rel, out_pdf)
+    cmd, env = tectonic_command(workdir, main_rel, out_pdf)
     try:
         proc = subprocess.run(
             cmd,
@@ -107,13 +124,8 @@ def build_pdf(workdir: Path, main_rel: Path, out_pdf: Path) -> Tuple[bool, str,
         )
         log = (proc.stdout or "") + (proc.stderr or "")
         # Kiểm tra file PDF đã có chưa (tectonic đặt theo tên main)
-        produced_pdf = out_pdf
-        if not produced_pdf.exists():
-            # Nếu tên PDF khác (ví dụ tên của main.tex), tìm file lớn nhất trong outdir
-            pdfs = sorted(out_pdf.parent.glob("*.pdf"), key=lambda p: p.stat().st_mtime, reverse=True)
-            if pdfs:
-                produced_pdf = pdfs[0]
-        if proc.returncode != 0 or not produced_pdf.exists():
+        produced_pdf = find_built_pdf(out_pdf, main_rel)
+        if proc.returncode != 0 or produced_pdf is None:
             return False, f"$ {' '.join(shlex.quote(x) for x in cmd)}\n\n{log}", None
         return True, log, produced_pdf
     except FileNotFoundError:
@@ -19,13 +19,22 @@ _TOKEN_RE = re.compile(
     re.VERBOSE | re.DOTALL,
 )
 
-def _read_text_guess(p: Path) -> str:
-    for enc in ("utf-8", "latin-1"):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            pass
-    return ""
+def read_text_guess(path: Path) -> str:
+    """Text of a TeX source: UTF-8, else latin-1 (never fails), newlines normalised; "" if unreadable.
+
+    One read + one whole-buffer decode, instead of re-reading the file per candidate encoding.
+    """
+    try:
+        data = path.read_bytes()
+    except Exception:
+        return ""
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        text = data.decode("latin-1")
+    if "\r" in text:  # same universal-newline result as read_text
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
 def _tokenise(s: str) -> list[str]:
     return [m.group(0) for m in _TOKEN_RE.finditer(s)]
@@ -67,7 +76,7 @@ def _simplediff_body(old_body: str, new_body: str) -> str:
 
 def run_simplediff(old_main: Path, new_main: Path, out_tex: Path) -> Tuple[bool, str]:
     try:
-        old_src, new_src = _read_text_guess(old_main), _read_text_guess(new_main)
+        old_src, new_src = read_text_guess(old_main), read_text_guess(new_main)
         if not new_src:
             return False, "New TeX empty or unreadable."
         mark = "\\begin{document}"
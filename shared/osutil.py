@@ -1,16 +1,127 @@
 # shared/osutil.py
 from __future__ import annotations
 
+import os
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+try:  # Windows, Python 3.12+
+    from _winapi import CopyFile2 as _CopyFile2  # type: ignore[attr-defined]
+except ImportError:
+    _CopyFile2 = None
+
+_HAS_COPY_FILE_RANGE = hasattr(os, "copy_file_range")  # Linux, Python 3.8+
 
 
 def open_with_default_app(path: Path) -> None:
+    # Native shell-open (no fork/exec) while a Qt GUI app is running; otherwise, or if Qt declines,
+    # the platform launcher. Qt is imported here so the file helpers below don't depend on it.
+    from PySide6.QtCore import QCoreApplication, QUrl
+    from PySide6.QtGui import QDesktopServices, QGuiApplication
+
+    if isinstance(QCoreApplication.instance(), QGuiApplication) and QDesktopServices.openUrl(QUrl.fromLocalFile(str(path))):
+        return
     if sys.platform.startswith("win"):
-        import os
         os.startfile(str(path))  # type: ignore[attr-defined]
     elif sys.platform == "darwin":
         subprocess.run(["open", str(path)], check=False)
     else:
         subprocess.run(["xdg-open", str(path)], check=False)
+
+
+def iter_files(root: Path, *, skip_dirs: frozenset[str] = frozenset(),
+               dir_mtimes: Optional[dict[str, int]] = None) -> Iterator[tuple[str, str]]:
+    """Yield (path, relpath) for every file under `root` using os.scandir.
+
+    Directory entries reuse the type info from the scan (no extra stat per entry) and
+    directories named in `skip_dirs` are pruned at any depth instead of walked and filtered.
+    If given, `dir_mtimes` maps every directory that was listed (root included) to its mtime_ns,
+    taken just before it is listed: a file added during the walk leaves the folder newer than recorded.
+    """
+    stack = [(str(root), "")]
+    while stack:
+        top, rel = stack.pop()
+        try:
+            mtime = os.stat(top).st_mtime_ns if dir_mtimes is not None else 0
+            it = os.scandir(top)
+        except OSError:
+            continue
+        if dir_mtimes is not None: dir_mtimes[top] = mtime
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    if e.name not in skip_dirs:
+                        stack.append((e.path, rel + e.name + os.sep))
+                elif e.is_file():
+                    yield e.path, rel + e.name
+
+
+def fast_copy(src: str | os.PathLike, dst: str | os.PathLike) -> None:
+    """Copy file data and timestamps through the OS copy path.
+
+    Windows uses CopyFile2 (copied by the filesystem/driver, block-cloned on ReFS).
+    Linux tries copy_file_range first (a reflink on btrfs/XFS, server-side on NFS 4.2).
+    Otherwise shutil.copyfile copies in-kernel (sendfile on Linux, fcopyfile on macOS).
+    One utime then restores the timestamps without copystat's extra calls.
+    """
+    if _CopyFile2 is not None:
+        _CopyFile2(os.fspath(src), os.fspath(dst), 0)
+        return
+    st = os.stat(src)
+    if not (_HAS_COPY_FILE_RANGE and _copy_file_range(src, dst)):
+        shutil.copyfile(src, dst)
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _copy_file_range(src: str | os.PathLike, dst: str | os.PathLike) -> bool:
+    """Whole-file copy_file_range; False (nothing to clean up, dst is rewritten) if the kernel/FS declines."""
+    try:
+        with open(src, "rb") as fs, open(dst, "wb") as fd:
+            while os.copy_file_range(fs.fileno(), fd.fileno(), 1 << 30):
+                pass
+        return True
+    except OSError:  # ENOSYS / EXDEV / EINVAL on older kernels or unsupported filesystems
+        return False
+
+
+def copy_files(jobs: Iterable[tuple[str | os.PathLike, str | os.PathLike]]) -> None:
+    """fast_copy each (src, dst) pair (parent dirs must exist) on a few threads.
+
+    Overlaps per-file latency on SSDs and network/OneDrive roots; the first failure
+    cancels the pending copies and is raised.
+    """
+    jobs = list(jobs)
+    if len(jobs) < 2:
+        for src, dst in jobs: fast_copy(src, dst)
+        return
+    with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2, len(jobs))) as ex:
+        futs = [ex.submit(fast_copy, src, dst) for src, dst in jobs]
+        try:
+            for f in as_completed(futs):
+                f.result()
+        except BaseException:
+            for f in futs: f.cancel()
+            raise
+
+
+# Windows placeholder attributes (OneDrive / cloud-files API): content is fetched on first access
+_FILE_ATTRIBUTE_OFFLINE = 0x00001000
+_FILE_ATTRIBUTE_RECALL_ON_OPEN = 0x00040000
+_FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS = 0x00400000
+_CLOUD_ONLY = _FILE_ATTRIBUTE_OFFLINE | _FILE_ATTRIBUTE_RECALL_ON_OPEN | _FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS
+
+
+def prefetch_file(path: Path, nbytes: int = 4096) -> None:
+    """Read the head of `path` so a cloud-only file is hydrated before it is opened. Blocking; run off the GUI thread."""
+    try:
+        attrs = getattr(os.stat(path), "st_file_attributes", None)
+        if attrs is not None and not attrs & _CLOUD_ONLY:
+            return  # already local
+        with open(path, "rb") as f:
+            f.read(nbytes)
+    except OSError:
+        pass
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from pathlib import Path
 
+_NON_SLUG = re.compile(r"[^a-z0-9]+")  # also swallows runs of '-', so no second collapse pass is needed
 
+
+@lru_cache(maxsize=32)
 def slugify(name: str) -> str:
-    s = name.strip().lower()
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"-{2,}", "-", s).strip("-")
+    s = _NON_SLUG.sub("-", name.strip().lower()).strip("-")
     return s or "untitled"
 
 
@@ -0,0 +1,63 @@
+# shared/ui/tasks.py
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+# ── worker ───────────────────────────────────────────────────────────────
+class TaskSignals(QObject):
+    done = Signal(object)     # return value of the wrapped callable
+    error = Signal(str)
+
+
+class FuncTask(QRunnable):
+    """Run `fn(*args, **kwargs)` on a QThreadPool thread; report back via `signals`.
+
+    `signals` is created on the caller's (GUI) thread, so slots connected to it
+    are invoked on the GUI thread through a queued connection.
+    """
+
+    def __init__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+
+    def run(self) -> None:
+        try:
+            res = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.done.emit(res)
+
+
+# Keep Python wrappers alive until their signals have been delivered.
+_running: set[FuncTask] = set()
+
+
+def run_in_pool(
+    fn: Callable[..., Any],
+    *args: Any,
+    on_done: Optional[Callable[[Any], None]] = None,
+    on_error: Optional[Callable[[str], None]] = None,
+    pool: Optional[QThreadPool] = None,
+    **kwargs: Any,
+) -> FuncTask:
+    """Start `fn` in the background; `on_done(result)` / `on_error(msg)` run on the GUI thread."""
+    task = FuncTask(fn, *args, **kwargs)
+    task.setAutoDelete(False)
+    _running.add(task)
+
+    def _finish() -> None:
+        _running.discard(task)
+
+    if on_done: task.signals.done.connect(on_done)
+    if on_error: task.signals.error.connect(on_error)
+    task.signals.done.connect(lambda _res: _finish())
+    task.signals.error.connect(lambda _msg: _finish())
+    (pool or QThreadPool.globalInstance()).start(task)
+    return task
@@ -13,6 +13,8 @@ from PySide6.QtCore import Qt, QThread, QTimer, QUrl, Signal
 from PySide6.QtGui import QDesktopServices
 from PySide6.QtWidgets import QApplication, QMessageBox, QProgressDialog
 
+from shared.ui.tasks import run_in_pool
+
 
 # ── version helpers ──────────────────────────────────────────────────────
 def _vtuple(s: str) -> tuple[int, ...]:
@@ -213,7 +215,29 @@ def check_for_updates(
     if ans != QMessageBox.Yes:
         return
 
-    latest = fetch_latest_version(repo, allow_prerelease=allow_prerelease, timeout_sec=10)
+    # Version lookup hits GitHub (up to 3 requests) → keep it off the GUI thread
+    checking = QProgressDialog("Checking for updates…", "Cancel", 0, 0, parent)
+    checking.setWindowTitle("Updates")
+    checking.setMinimumDuration(400)
+    cancelled = [False]
+    checking.canceled.connect(lambda: cancelled.__setitem__(0, True))
+
+    def _on_latest(latest: Optional[str]) -> None:
+        if cancelled[0]:
+            return
+        checking.blockSignals(True); checking.close(); checking.deleteLater()
+        _download_if_newer(parent, latest, app_id=app_id, repo=repo, current_version=current_version,
+                           app_keyword=app_keyword, watchdog_ms=watchdog_ms)
+
+    def _on_fetch_error(_msg: str) -> None:
+        _on_latest(None)
+
+    run_in_pool(fetch_latest_version, repo, allow_prerelease=allow_prerelease, timeout_sec=10,
+                on_done=_on_latest, on_error=_on_fetch_error)
+
+
+def _download_if_newer(parent, latest: Optional[str], *, app_id: str, repo: str,
+                       current_version: str, app_keyword: str, watchdog_ms: int) -> None:
     if not latest:
         QMessageBox.information(parent, "Updates", "Couldn't reach update server. Please try again later.")
         return
@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from shared import detect
+from shared.detect import _scan_kinds
+from shared.latex.builder import find_built_pdf
+from shared.latex.diff import read_text_guess
+from shared.osutil import copy_files, fast_copy, iter_files
+
+
+def write(p: Path, content: str = "x") -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(content, encoding="utf-8")
+
+def test_iter_files_prunes_skip_dirs_at_any_depth(tmp_path: Path):
+    for rel in ("main.tex", "fig/a.png", ".paperrepo/HEAD", "sec/.paperrepo/objects/x",
+                "sec/deep/reviews/r.docx", "sec/deep/keep.bib"):
+        write(tmp_path / rel)
+
+    mtimes: dict[str, int] = {}
+    rels = {rel.replace(os.sep, "/") for _, rel in
+            iter_files(tmp_path, skip_dirs=frozenset({".paperrepo", "reviews"}), dir_mtimes=mtimes)}
+    assert rels == {"main.tex", "fig/a.png", "sec/deep/keep.bib"}
+
+    # pruned folders are never listed; every listed one carries its mtime
+    assert str(tmp_path) in mtimes and str(tmp_path / "sec" / "deep") in mtimes
+    assert not any(".paperrepo" in d or "reviews" in d for d in mtimes)
+    assert mtimes[str(tmp_path / "fig")] == (tmp_path / "fig").stat().st_mtime_ns
+
+def test_fast_copy_keeps_content_and_mtime(tmp_path: Path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(256 * 1024))
+    os.utime(src, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+
+    dst = tmp_path / "dst.bin"
+    fast_copy(src, dst)
+    assert dst.read_bytes() == src.read_bytes()
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+
+def test_copy_files_copies_all_and_raises_on_failure(tmp_path: Path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    for i in range(12):
+        write(src / f"f{i}.txt", f"content {i}")
+    dst.mkdir()
+    copy_files((src / f"f{i}.txt", dst / f"f{i}.txt") for i in range(12))
+    assert all((dst / f"f{i}.txt").read_text(encoding="utf-8") == f"content {i}" for i in range(12))
+
+    with pytest.raises(OSError):
+        copy_files([(src / "f0.txt", dst / "ok.txt"), (src / "missing.txt", dst / "missing.txt")])
+
+def test_scan_kinds_stops_once_both_kinds_are_seen(tmp_path: Path, monkeypatch):
+    write(tmp_path / "main.tex"); write(tmp_path / "main.docx")
+    for i in range(5):
+        write(tmp_path / f"sub{i}" / "x.txt")
+
+    listed: list[str] = []
+    real_scandir = os.scandir
+    def scandir(path):
+        listed.append(os.fspath(path))
+        return real_scandir(path)
+    monkeypatch.setattr(detect.os, "scandir", scandir)
+
+    assert _scan_kinds(tmp_path) == (True, True)
+    assert listed == [str(tmp_path)]  # sub-folders were never walked
+
+    listed.clear()
+    (tmp_path / "main.docx").unlink()
+    assert _scan_kinds(tmp_path) == (False, True)
+    assert len(listed) == 6
+
+def test_find_built_pdf_prefers_main_stem(tmp_path: Path):
+    out_pdf = tmp_path / "compiled.pdf"
+    assert find_built_pdf(out_pdf, Path("main.tex")) is None
+
+    (tmp_path / "other.pdf").write_bytes(b"%PDF")
+    assert find_built_pdf(out_pdf) == tmp_path / "other.pdf"  # newest PDF as a last resort
+
+    out_pdf.write_bytes(b"%PDF")
+    assert find_built_pdf(out_pdf, Path("main.tex")) == out_pdf
+
+    (tmp_path / "main.pdf").write_bytes(b"%PDF")
+    assert find_built_pdf(out_pdf, Path("sec/main.tex")) == tmp_path / "main.pdf"
+
+def test_read_text_guess_normalises_newlines_and_falls_back(tmp_path: Path):
+    p = tmp_path / "a.tex"
+    p.write_bytes("héllo\r\nworld\rend\n".encode("utf-8"))
+    assert read_text_guess(p) == "héllo\nworld\nend\n"
+
+    p.write_bytes(b"caf\xe9\r\n")  # not valid UTF-8
+    assert read_text_guess(p) == "café\n"
+
+    assert read_text_guess(tmp_path / "missing.tex") == ""
@@ -0,0 +1,82 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from apps.student_app import scan
+from shared.events import get_all_submission_times, new_submission_event, returned_event, write_event
+
+
+@pytest.fixture(autouse=True)
+def _isolated_index(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(scan, "_INDEX_DIR", tmp_path / "cache")
+    scan.invalidate_inbox_cache()
+    yield
+    scan.invalidate_inbox_cache()
+
+_OLD_MTIME = 1_000_000_000_000_000_000  # distinct from "now" whatever the filesystem's timestamp granularity
+
+def _review(mroot: Path, sub_id: str, due: str = "") -> Path:
+    d = mroot / "reviews" / sub_id
+    d.mkdir(parents=True)
+    (d / "returned.docx").write_bytes(b"docx")
+    if due:
+        (d / "due.json").write_text(json.dumps({"return_due": due}), encoding="utf-8")
+    return d
+
+def _rewrite_in_place(p: Path, text: str, mtime_ns: int) -> None:
+    with open(p, "r+", encoding="utf-8") as f:  # same inode: the folder mtime does not move
+        f.write(text); f.truncate()
+    os.utime(p, ns=(mtime_ns, mtime_ns))
+
+def test_get_all_submission_times_earliest_submitted_latest_returned(tmp_path: Path):
+    ev = tmp_path / "events"
+    write_event(ev, new_submission_event("s1", ts="2025-01-02T00:00:00Z"))
+    write_event(ev, new_submission_event("s1", ts="2025-01-01T00:00:00Z"))
+    write_event(ev, returned_event("s1", ts="2025-01-03T00:00:00Z"))
+    write_event(ev, returned_event("s1", ts="2025-01-05T00:00:00Z"))
+    write_event(ev, new_submission_event("s2", ts="2025-02-01T00:00:00Z"))
+
+    times = get_all_submission_times(ev)
+    assert times["s1"][0].startswith("2025-01-01") and times["s1"][1].startswith("2025-01-05")
+    assert times["s2"][0].startswith("2025-02-01") and times["s2"][1] is None
+
+def test_scan_inbox_sees_in_place_due_rewrite_and_new_comments(tmp_path: Path):
+    mroot = tmp_path / "m"
+    d = _review(mroot, "20250101-aaaa", due="2099-01-01T00:00:00+00:00")
+
+    rows = scan.scan_inbox(mroot)
+    assert [r.sub_id for r in rows] == ["20250101-aaaa"]
+    assert rows[0].file == d / "returned.docx" and rows[0].comments_json is None
+    assert not rows[0].overdue
+
+    _rewrite_in_place(d / "due.json", json.dumps({"return_due": "2000-01-01T00:00:00+00:00"}), _OLD_MTIME)
+    rows = scan.scan_inbox(mroot)
+    assert rows[0].due_iso.startswith("2000-01-01") and rows[0].overdue
+
+    (d / "comments.json").write_text("{}", encoding="utf-8")
+    assert scan.scan_inbox(mroot)[0].comments_json == d / "comments.json"
+
+def test_scan_inbox_index_is_per_user_relative_and_reused(tmp_path: Path, monkeypatch):
+    mroot = tmp_path / "m"
+    d = _review(mroot, "20250101-aaaa", due="2099-01-01T00:00:00+00:00")
+    scan.scan_inbox(mroot)
+
+    assert not (mroot / ".paperrepo" / "inbox_index.json").exists()
+    assert [p.suffix for p in (tmp_path / "cache").iterdir()] == [".json"]  # no temp file left behind
+    index = scan.load_index(mroot)
+    assert index["20250101-aaaa"][1]["file"] == "returned.docx"  # relative to the review folder
+
+    # "restart": nothing in memory, unchanged folders come from the index without being listed
+    scan.invalidate_inbox_cache()
+    probed: list[str] = []
+    real_probe = scan._probe
+    monkeypatch.setattr(scan, "_probe", lambda e: probed.append(e.name) or real_probe(e))
+    assert scan.scan_inbox(mroot)[0].file == d / "returned.docx"
+    assert probed == []
+
+    scan.invalidate_inbox_cache()
+    _rewrite_in_place(d / "due.json", json.dumps({"return_due": "2000-01-01T00:00:00+00:00"}), _OLD_MTIME)
+    assert scan.scan_inbox(mroot)[0].overdue
+    assert probed == ["20250101-aaaa"]